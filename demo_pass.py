@@ -14,10 +14,15 @@ def calculate_total(items):
         ValueError: If the items list is empty
         TypeError: If non-numeric values are provided
     """
+    # Materialize one-shot iterables once so the checks and the sum see the same data
+    if not isinstance(items, (list, tuple)):
+        items = list(items)
+    
     if not items:
         raise ValueError("Cannot calculate total of empty list")
     
-    if not all(isinstance(x, (int, float)) for x in items):
+    # Check each distinct element type once rather than every element
+    if not all(issubclass(t, (int, float)) for t in set(map(type, items))):
         raise TypeError("All values must be numeric")
     
     return sum(items)
\ No newline at end of file
@@ -1,61 +1,331 @@
 #!/usr/bin/env python3
-import argparse
-import json
+import fnmatch
+import hashlib
+import mmap
+import os
+import re
 import sys
 from pathlib import Path
-from m2_core import DocstringValidator
+from types import SimpleNamespace
 
-def main():
+from docugenius_config import load_config
+
+# Number of file reads kept in flight at once when validating many files
+READ_WORKERS = 32
+
+# Files at least this large are memory-mapped instead of read into a buffer
+MMAP_THRESHOLD = 2 * 1024 * 1024
+
+# Banner and summary, each emitted with a single write
+_SEP = "=" * 60
+_BANNER = (
+    f"\n{_SEP}\n"
+    "DocuGenius Validation (Milestone 3)\n"
+    "Coverage Threshold: {}%\n"
+    "Compliance Threshold: {}%\n"
+    f"{_SEP}\n"
+)
+_SUMMARY = f"\n{_SEP}\nSUMMARY: {{}}/{{}} files passed\n{_SEP}\n"
+
+# Any function or class definition; files without one have nothing to document
+_DEF_RE = re.compile(r'^[ \t]*(?:async[ \t]+)?(?:def|class)\s', re.M)
+
+# DocstringValidator.analyze_code_quality, bound once per process by _init_analyzer
+_analyze_code_quality = None
+
+# Opt-in (--cache-file) results of previous runs, keyed by a hash of each file's content.
+# Bump when the layout of an entry changes; analysis changes are tracked by _cache_version
+CACHE_VERSION = 2
+
+# Entries kept in the cache file; those not seen for the longest are dropped first
+CACHE_MAX_ENTRIES = 10000
+
+
+def _exclude_matcher(patterns):
+    """Compile glob patterns into one matcher for paths relative to a scanned directory"""
+    if not patterns:
+        return None
+    return re.compile('|'.join(fnmatch.translate(p) for p in patterns)).match
+
+
+def _collect_py_files(paths, exclude_patterns=()):
+    """Expand directory arguments into .py files, keeping any stat already fetched
+
+    Files named explicitly are always kept; exclude_patterns only prune directory scans.
+    """
+    excluded = _exclude_matcher(exclude_patterns)
+    collected = []
+    for path in paths:
+        if os.path.isdir(path):
+            _scan_py_files(path, collected, excluded)
+        elif path.endswith('.py'):
+            collected.append((path, None))
+    return collected
+
+
+def _scan_py_files(directory, collected, excluded=None, prefix=''):
+    """Recursively append (path, stat) for every .py file under directory
+
+    Symlinked and hidden directories are not entered and excluded paths are pruned.
+    This differs from m2_core's _iter_py_files behind process_directory, which also
+    skips symlinked directories but enters hidden ones and knows no exclude patterns,
+    so the two can pick different files from one tree.
+    """
+    with os.scandir(directory) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        relpath = prefix + entry.name
+        if entry.is_dir(follow_symlinks=False):
+            if entry.name.startswith('.') or (excluded and excluded(relpath + '/')):
+                continue
+            _scan_py_files(entry.path, collected, excluded, relpath + '/')
+        elif entry.name.endswith('.py') and entry.is_file() and not (excluded and excluded(relpath)):
+            collected.append((entry.path, entry.stat()))
+
+
+def _stat_source(filepath):
+    """Stat a source file, returning None if it cannot be stat'ed"""
+    try:
+        return os.stat(filepath)
+    except OSError:
+        return None
+
+
+def _decode_source(buffer):
+    """Decode like open(..., encoding='utf-8') would, universal newlines included"""
+    return str(buffer, 'utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _map_source(fd):
+    """Decode a large file straight out of a read-only memory map"""
+    with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        return _decode_source(mm)
+
+
+def _read_source(filepath, size=None):
+    """Read a source file, returning the exception instead of raising it"""
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+        try:
+            if size is None:
+                size = os.fstat(fd).st_size
+            if size >= MMAP_THRESHOLD:
+                return _map_source(fd)
+            if size and hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(fd, 0, size, os.POSIX_FADV_SEQUENTIAL)
+                os.posix_fadvise(fd, 0, size, os.POSIX_FADV_WILLNEED)
+            chunks = []
+            while True:
+                chunk = os.read(fd, max(size, 65536))
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        finally:
+            os.close(fd)
+        return _decode_source(b''.join(chunks))
+    except Exception as e:
+        return e
+
+
+def _read_sources(filepaths, stats=None):
+    """Read all files up front with several reads in flight at once"""
+    if len(filepaths) < 2:
+        return [_read_source(p) for p in filepaths]
+    from concurrent.futures import ThreadPoolExecutor
+    workers = min(READ_WORKERS, len(filepaths))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        stats = list(stats or [None] * len(filepaths))
+        missing = [i for i, st in enumerate(stats) if st is None]
+        for i, st in zip(missing, pool.map(_stat_source, [filepaths[i] for i in missing])):
+            stats[i] = st
+        # Issue the reads in on-disk order, but hand results back in argument order
+        order = sorted(
+            range(len(filepaths)),
+            key=lambda i: (stats[i].st_dev, stats[i].st_ino) if stats[i] else (0, 0),
+        )
+        sizes = [stats[i].st_size if stats[i] else 0 for i in order]
+        contents = pool.map(_read_source, [filepaths[i] for i in order], sizes)
+        sources = [None] * len(filepaths)
+        for i, content in zip(order, contents):
+            sources[i] = content
+    return sources
+
+
+def _init_analyzer():
+    """Import m2_core once per process and keep its analyzer bound for reuse"""
+    global _analyze_code_quality
+    if _analyze_code_quality is None:
+        # Imported here so `--help` and fully cached runs never load m2_core
+        from m2_core import DocstringValidator
+        _analyze_code_quality = DocstringValidator.analyze_code_quality
+
+
+def _analyze_source(content):
+    """Return (coverage, compliance) for one source, or the exception raised"""
+    if isinstance(content, Exception):
+        return content
+    try:
+        if not _DEF_RE.search(content):
+            # Still parsed, so syntax errors fail as they would in analyze_code_quality,
+            # whose report for a file with nothing to document is 0% coverage and compliance
+            import ast
+            ast.parse(content)
+            return 0, 0
+        _init_analyzer()
+        quality = _analyze_code_quality(content)
+        return quality['coverage_percentage'], quality['compliance_percentage']
+    except Exception as e:
+        return e
+
+
+def _analyze_sources(sources):
+    """Analyze every source, fanning out across processes for multi-file runs"""
+    if len(sources) < 2:
+        return [_analyze_source(s) for s in sources]
+    # Imported here: it pulls in multiprocessing, which single-file and cached runs don't need
+    from concurrent.futures import ProcessPoolExecutor
+    # Capped by the file count: every worker is started up front and imports m2_core
+    workers = min(os.cpu_count() or 1, len(sources))
+    chunksize = max(1, len(sources) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_analyzer) as pool:
+        return list(pool.map(_analyze_source, sources, chunksize=chunksize))
+
+
+def _content_key(content):
+    """Hash file content into a cache key"""
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _cache_version():
+    """Version tag for the cache file, extending m2_core's so pydocstyle or analysis changes invalidate it"""
+    from m2_core import _result_cache_version
+    return [CACHE_VERSION, *_result_cache_version()]
+
+
+def _load_cache(path):
+    """Load the result cache, starting empty if it is missing or stale"""
+    import json
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") == _cache_version():
+            return data.get("entries", {})
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {}
+
+
+def _save_cache(path, entries, recent_keys=()):
+    """Write the result cache back to disk, ignoring write failures
+
+    Keys from this run move to the end, so trimming to CACHE_MAX_ENTRIES drops
+    the entries that have gone unused the longest.
+    """
+    import json
+    for key in dict.fromkeys(recent_keys):
+        if key in entries:
+            entries[key] = entries.pop(key)
+    if len(entries) > CACHE_MAX_ENTRIES:
+        entries = dict(list(entries.items())[-CACHE_MAX_ENTRIES:])
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"version": _cache_version(), "entries": entries}, f)
+    except OSError as e:
+        print(f"Warning: Failed to write cache {path}: {e}", file=sys.stderr)
+
+
+def _parse_args(argv, config):
+    """Parse CLI arguments, with threshold defaults taken from the project config"""
+    # Common CI shape: nothing but file paths, so skip building the argparse parser
+    if argv and not any(arg.startswith('-') for arg in argv):
+        return SimpleNamespace(
+            files=list(argv),
+            min_coverage=config["min_coverage"],
+            min_compliance=config["min_compliance"],
+            output=None,
+            cache_file=None,
+        )
+    
+    import argparse
     parser = argparse.ArgumentParser(description="DocuGenius Validator (Milestone 3)")
-    parser.add_argument("files", nargs="+", help="Python files to validate")
-    parser.add_argument("--min-coverage", type=float, default=90.0, help="Coverage threshold")
-    parser.add_argument("--min-compliance", type=float, default=85.0, help="Compliance threshold")
+    parser.add_argument("files", nargs="+", help="Python files or directories to validate")
+    parser.add_argument("--min-coverage", type=float, default=config["min_coverage"], help="Coverage threshold")
+    parser.add_argument("--min-compliance", type=float, default=config["min_compliance"], help="Compliance threshold")
     parser.add_argument("--output", type=Path, help="Output JSON report")
+    parser.add_argument("--cache-file", type=Path, help="Reuse and update results cached in this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Validate the given files; argv defaults to sys.argv[1:]"""
+    argv = sys.argv[1:] if argv is None else argv
+    config = load_config()
+    args = _parse_args(argv, config)
     
-    args = parser.parse_args()
-    
-    print(f"\n{'='*60}")
-    print(f"DocuGenius Validation (Milestone 3)")
-    print(f"Coverage Threshold: {args.min_coverage}%")
-    print(f"Compliance Threshold: {args.min_compliance}%")
-    print(f"{'='*60}")
+    sys.stdout.write(_BANNER.format(args.min_coverage, args.min_compliance))
     
     results = []
+    output = []
+    passed_count = 0
+    failed_count = 0
     all_passed = True  # ← START WITH TRUE
     
-    for filepath in args.files:
-        if not filepath.endswith('.py'):
-            continue
-            
+    collected = _collect_py_files(args.files, config["exclude_patterns"])
+    py_files = [path for path, _ in collected]
+    sources = _read_sources(py_files, [st for _, st in collected])
+    
+    # Only analyze files whose content has not been seen by a previous run
+    cache = _load_cache(args.cache_file) if args.cache_file else {}
+    keys = [None if isinstance(s, Exception) else _content_key(s) for s in sources]
+    analyses = [cache.get(k) if k is not None else None for k in keys]
+    pending = [i for i, a in enumerate(analyses) if a is None]
+    for i, analysis in zip(pending, _analyze_sources([sources[i] for i in pending])):
+        analyses[i] = analysis
+        if keys[i] is not None and not isinstance(analysis, Exception):
+            cache[keys[i]] = list(analysis)
+    if args.cache_file and pending:
+        _save_cache(args.cache_file, cache, [k for k in keys if k is not None])
+    
+    for filepath, analysis in zip(py_files, analyses):
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
+            if isinstance(analysis, Exception):
+                raise analysis
             
-            quality = DocstringValidator.analyze_code_quality(content)
+            coverage, compliance = analysis
             passed = (
-                quality['coverage_percentage'] >= args.min_coverage and 
-                quality['compliance_percentage'] >= args.min_compliance
+                coverage >= args.min_coverage and 
+                compliance >= args.min_compliance
             )
             
             status = "PASSED" if passed else "FAILED"
-            print(f"\nFile: {Path(filepath).name}")
-            print(f"   Coverage: {quality['coverage_percentage']}% ({status})")
-            print(f"   Compliance: {quality['compliance_percentage']}%")
+            output.append(
+                f"\nFile: {os.path.basename(filepath)}\n"
+                f"   Coverage: {coverage}% ({status})\n"
+                f"   Compliance: {compliance}%\n"
+            )
             
             results.append({
                 'filepath': filepath,
-                'coverage': quality['coverage_percentage'],
-                'compliance': quality['compliance_percentage'],
+                'coverage': coverage,
+                'compliance': compliance,
                 'passed': passed
             })
             
-            if not passed:
+            if passed:
+                passed_count += 1
+            else:
+                failed_count += 1
                 all_passed = False  # ← ONLY set to False if a file fails
                 
         except Exception as e:
-            print(f"\nError processing {filepath}: {e}")
+            output.append(f"\nError processing {filepath}: {e}\n")
             all_passed = False  # ← Error = failure
     
+    # Per-file lines are buffered and written in one go
+    sys.stdout.write("".join(output))
+    
     # Generate report
     if args.output:
         report = {
@@ -66,18 +336,21 @@ def main():
             "files": results,
             "summary": {
                 "total": len(results),
-                "passed": sum(1 for r in results if r['passed']),
-                "failed": sum(1 for r in results if not r['passed'])
+                "passed": passed_count,
+                "failed": failed_count
             }
         }
-        with open(args.output, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2)
+        try:
+            import orjson  # Optional: much faster encoder for large reports
+            with open(args.output, 'wb') as f:
+                f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        except ImportError:
+            import json
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
         print(f"\nReport saved to: {args.output}")
     
-    print(f"\n{'='*60}")
-    passed_count = sum(1 for r in results if r['passed'])
-    print(f"SUMMARY: {passed_count}/{len(results)} files passed")
-    print(f"{'='*60}")
+    sys.stdout.write(_SUMMARY.format(passed_count, len(results)))
     
     # CRITICAL: Exit with 0 if ALL passed, 1 if ANY failed
     # At the VERY END of main() function, replace any existing sys.exit with:
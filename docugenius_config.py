@@ -1,33 +1,80 @@
 # docugenius_config.py - Reads config from pyproject.toml WITHOUT modifying your core code
-import tomllib  # Python 3.11+ (use 'import tomli as tomllib' for Python <3.11)
+import functools
+import types
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Mapping, Optional
 
-DEFAULT_CONFIG = {
+# Shared read-only defaults; callers needing a mutable config should dict() it
+DEFAULT_CONFIG = types.MappingProxyType({
     "style": "google",
     "min_coverage": 90.0,
     "min_compliance": 85.0,
-    "exclude_patterns": ["tests/**", "venv/**", "__pycache__/**", ".*"]
-}
+    "exclude_patterns": ("tests/**", "venv/**", "__pycache__/**", ".*")
+})
 
-def load_config(root_dir: Path = None) -> Dict[str, Any]:
-    """Load configuration from pyproject.toml in the project root"""
+def load_config(root_dir: Path = None) -> Mapping[str, Any]:
+    """Load read-only configuration from pyproject.toml in the project root"""
     root_dir = root_dir or Path.cwd()
     config_path = root_dir / "pyproject.toml"
     
-    if not config_path.exists():
-        return DEFAULT_CONFIG.copy()
+    try:
+        mtime = config_path.stat().st_mtime_ns
+    except OSError:
+        return DEFAULT_CONFIG
+    
+    # The parse is memoized per file and mtime; the result is read-only so it can be shared
+    return _load_config_file(str(config_path.resolve()), mtime)
+
+def _find_section(data: bytes, header: bytes) -> Optional[bytes]:
+    """Return the raw TOML text of one table, or None if it is not present"""
+    start = data.find(header)
+    while start > 0 and data[start - 1:start] != b"\n":
+        start = data.find(header, start + 1)
+    if start == -1:
+        return None
     
+    # The table runs until the next header that isn't one of its own sub-tables
+    subtable = header[:-1] + b"."
+    end = data.find(b"\n[", start)
+    while end != -1 and data.startswith(subtable, end + 1):
+        end = data.find(b"\n[", end + 1)
+    # Keep the newline, so a CRLF file's last line doesn't end in a bare \r
+    return data[start:] if end == -1 else data[start:end + 1]
+
+@functools.lru_cache(maxsize=8)
+def _load_config_file(config_path: str, mtime: int) -> Mapping[str, Any]:
+    """Parse pyproject.toml once per (path, mtime) pair"""
     try:
         with open(config_path, "rb") as f:
-            pyproject = tomllib.load(f)
+            data = f.read()
+        
+        # Only hand the [tool.docugenius] table (and its sub-tables) to the parser
+        section = _find_section(data, b"[tool.docugenius]")
+        if section is None:
+            if b"docugenius" not in data:
+                return DEFAULT_CONFIG
+            section = data  # Configured some other way (e.g. dotted keys), parse it all
+        
+        # Imported lazily: only projects that actually configure docugenius pay for it
+        try:
+            import tomllib  # Python 3.11+
+        except ModuleNotFoundError:
+            import tomli as tomllib
+        try:
+            pyproject = tomllib.loads(section.decode("utf-8"))
+        except tomllib.TOMLDecodeError:
+            if section is data:
+                raise
+            # The cut can land inside a value, e.g. a multi-line array with a line starting
+            # with "["; the whole file is the authority, so parse all of it before giving up
+            pyproject = tomllib.loads(data.decode("utf-8"))
         
         # Extract docugenius-specific config
         tool_config = pyproject.get("tool", {}).get("docugenius", {})
-        config = DEFAULT_CONFIG.copy()
-        config.update(tool_config)
-        return config
+        # Lists become tuples so the shared cached config stays immutable
+        tool_config = {k: tuple(v) if isinstance(v, list) else v for k, v in tool_config.items()}
+        return types.MappingProxyType(dict(DEFAULT_CONFIG) | tool_config)
         
     except Exception as e:
         print(f"Warning: Failed to load pyproject.toml config: {e}")
-        return DEFAULT_CONFIG.copy()
\ No newline at end of file
+        return DEFAULT_CONFIG
\ No newline at end of file
@@ -0,0 +1,25 @@
+# docugenius_zip.py - Builds the results ZIP in memory, without Streamlit
+import io
+import zipfile
+from typing import Iterable, Tuple
+
+# Texts shorter than this are stored as-is; a DEFLATE stream setup costs more than it saves
+ZIP_STORE_BELOW = 1024
+
+# Level 1 is much faster than the usual default of 6, for a few percent larger sources
+ZIP_LEVEL = 1
+
+
+def build_zip(members: Iterable[Tuple[str, str]]) -> bytes:
+    """Build a ZIP archive in memory from (name, text) members, in order
+
+    Short members are stored, the rest deflated at ZIP_LEVEL.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, text in members:
+            if len(text) < ZIP_STORE_BELOW:
+                zf.writestr(name, text, compress_type=zipfile.ZIP_STORED)
+            else:
+                zf.writestr(name, text, compress_type=zipfile.ZIP_DEFLATED, compresslevel=ZIP_LEVEL)
+    return buffer.getvalue()
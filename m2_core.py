@@ -1,26 +1,198 @@
 import ast
-import astor
-import pydocstyle
+from pydocstyle.checker import ConventionChecker
+from pydocstyle.parser import AllError, ParseError
+from pydocstyle.violations import conventions
 import re
 import os
-import tempfile
 import sys
-from typing import Dict, List, Tuple, Union, Optional
+import hashlib
+import functools
+import inspect
+import itertools
+import operator
+import threading
+import tokenize
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Tuple, Union, Optional
 import json
 
+# Source is regenerated with ast.unparse, which only exists from Python 3.9 on
+if sys.version_info < (3, 9):
+    raise ImportError("m2_core requires Python 3.9 or newer (ast.unparse)")
+
+# Call arguments in a raised exception, e.g. the "(msg)" in "ValueError(msg)"
+_PAREN_RE = re.compile(r'\([^)]*\)')
+
+# NumPy section headers and row templates, with each row's format method bound once
+_NUMPY_PARAMS_HDR = "Parameters\n----------\n"
+_NUMPY_PARAM_ROW = "{0} : {1}\n    TODO: describe parameter".format
+_NUMPY_RAISES_HDR = "Raises\n------\n"
+_NUMPY_RAISES_ROW = "{0}\n    TODO: describe exception\n".format
+_NUMPY_ATTRS_HDR = "Attributes\n----------\n"
+_NUMPY_ATTR_ROW = "{0} : {1}\n    TODO: describe attribute".format
+_NUMPY_METHODS_HDR = "Methods\n-------\n"
+_NUMPY_METHOD_ROW = "{0}()\n    TODO: describe method".format
+
+def _ann_to_str(node: ast.expr) -> str:
+    """Render an annotation, handling the common simple forms without ast.unparse"""
+    node_type = type(node)
+    if node_type is ast.Name:
+        return node.id
+    if node_type is ast.Attribute and type(node.value) in (ast.Name, ast.Attribute):
+        return f"{_ann_to_str(node.value)}.{node.attr}"
+    if node_type is ast.Subscript and type(node.value) in (ast.Name, ast.Attribute):
+        index = node.slice
+        if type(index) is not ast.Tuple:
+            return f"{_ann_to_str(node.value)}[{_ann_to_str(index)}]"
+        if len(index.elts) > 1:
+            inner = ", ".join([_ann_to_str(elt) for elt in index.elts])
+            return f"{_ann_to_str(node.value)}[{inner}]"
+    if node_type is ast.Constant and (node.value is None or type(node.value) is str):
+        return repr(node.value)
+    return ast.unparse(node)
+
+# Compound statements whose nested blocks may still assign instance attributes;
+# match (3.10) and try/except* (3.11) are left out on interpreters without them
+_BLOCK_TYPES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith, ast.Try,
+                getattr(ast, "TryStar", ()), getattr(ast, "Match", ()))
+
+def _iter_assigns(body: List[ast.stmt]):
+    """Yield assignments in a statement list, descending only into control-flow blocks"""
+    for stmt in body:
+        if isinstance(stmt, ast.Assign):
+            yield stmt
+        elif isinstance(stmt, _BLOCK_TYPES):
+            yield from _iter_assigns(getattr(stmt, 'body', ()))
+            for handler in getattr(stmt, 'handlers', ()):
+                yield from _iter_assigns(handler.body)
+            for case in getattr(stmt, 'cases', ()):
+                yield from _iter_assigns(case.body)
+            yield from _iter_assigns(getattr(stmt, 'orelse', ()))
+            yield from _iter_assigns(getattr(stmt, 'finalbody', ()))
+
+def _raw_docstring(node: ast.AST) -> Optional[str]:
+    """Return a node's docstring as written, without ast.get_docstring's cleandoc pass"""
+    if node.body:
+        first = node.body[0]
+        if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant) and isinstance(first.value.value, str):
+            return first.value.value
+    return None
+
+# Fields that hold statement lists, in the order NodeVisitor would reach them
+_STMT_LIST_FIELDS = ('body', 'handlers', 'orelse', 'finalbody', 'cases')
+
+class _DefinitionCollector(ast.NodeVisitor):
+    """Count functions and classes and note which lack a docstring, in one traversal"""
+    
+    def __init__(self):
+        self.total_functions = 0
+        self.total_classes = 0
+        self.undocumented_functions = []
+        self.undocumented_classes = []
+    
+    def visit_FunctionDef(self, node):
+        self.total_functions += 1
+        docstring = _raw_docstring(node)
+        if not (docstring and docstring.strip()):
+            self.undocumented_functions.append(node.name)
+        self.generic_visit(node)
+    
+    visit_AsyncFunctionDef = visit_FunctionDef
+    
+    def visit_ClassDef(self, node):
+        self.total_classes += 1
+        docstring = _raw_docstring(node)
+        if not (docstring and docstring.strip()):
+            self.undocumented_classes.append(node.name)
+        self.generic_visit(node)
+    
+    def generic_visit(self, node):
+        # Definitions are statements, so expression subtrees never need visiting
+        for field in _STMT_LIST_FIELDS:
+            stmts = getattr(node, field, None)
+            if stmts:
+                for stmt in stmts:
+                    self.visit(stmt)
+
+# Error codes of the PEP 257 convention, resolved once; conventions is an AttrDict,
+# so every conventions.pep257 lookup is a Python-level __getattr__ call
+_PEP257_CODES = frozenset(conventions.pep257)
+
+class _Pep257Checker(ConventionChecker):
+    """ConventionChecker whose check list is built once, not once per definition checked"""
+    
+    # The base class re-collects and sorts its check methods on every access
+    checks = ConventionChecker().checks
+
+class _ContentCache:
+    """Bounded LRU cache keyed by a hash of source text"""
+    
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(content: str, *extra) -> Tuple:
+        """Build a cache key from the content hash plus any extra parameters"""
+        digest = hashlib.blake2b(content.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        return (digest,) + extra
+    
+    def get(self, key: Tuple):
+        """Return the cached value for key, or None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key: Tuple, value) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+
+def _copy_report(report: Dict) -> Dict:
+    """Copy a cached quality report deep enough that callers can't mutate the cache"""
+    # Values are numbers or flat lists (names, violations), so copying the lists suffices
+    return {key: value[:] if type(value) is list else value for key, value in report.items()}
+
+# Quality reports and instrumented sources, so identical content is only processed once
+_QUALITY_CACHE = _ContentCache()
+_INSTRUMENT_CACHE = _ContentCache()
+
 class DocstringGenerator:
-    SUPPORTED_STYLES = ['google', 'numpy', 'reST']
+    # Lowercase names, matched against style.lower() (so 'reST' is accepted too)
+    SUPPORTED_STYLES = frozenset({'google', 'numpy', 'rest'})
     
     def __init__(self, style: str = 'google'):
         if style.lower() not in self.SUPPORTED_STYLES:
-            raise ValueError(f"Unsupported style: {style}. Choose from {self.SUPPORTED_STYLES}")
+            raise ValueError(f"Unsupported style: {style}. Choose from {sorted(self.SUPPORTED_STYLES)}")
         self.style = style.lower()
+        
+        # The style is fixed, so pick the formatters once instead of branching per docstring
+        self._format_function = {
+            'google': self._format_function_google,
+            'numpy': self._format_function_numpy,
+        }.get(self.style, self._format_function_rest)
+        self._format_class = {
+            'google': self._format_class_google,
+            'numpy': self._format_class_numpy,
+        }.get(self.style, self._format_class_rest)
     
     def extract_function_info(self, node: ast.FunctionDef) -> Dict:
         """Extract parameters, returns, raises, and yields information from AST node"""
         args = []
         for arg in node.args.args:
-            arg_type = ast.unparse(arg.annotation) if arg.annotation else "Any"
+            arg_type = _ann_to_str(arg.annotation) if arg.annotation else "Any"
             args.append((arg.arg, arg_type))
         
         # Handle *args and **kwargs
@@ -30,17 +202,23 @@ class DocstringGenerator:
             args.append((f"**{node.args.kwarg.arg}", "Any"))
         
         # Check for return annotation
-        returns = ast.unparse(node.returns) if node.returns else "None"
+        returns = _ann_to_str(node.returns) if node.returns else "None"
         
         # Detect raises and yields
         raises = set()
         yields = False
-        for stmt in ast.walk(node):
-            if isinstance(stmt, ast.Raise) and stmt.exc:
+        stack = list(node.body)
+        while stack:
+            stmt = stack.pop()
+            stmt_type = type(stmt)
+            if stmt_type is ast.Raise and stmt.exc:
                 exc_type = ast.unparse(stmt.exc)
-                raises.add(re.sub(r'\(.*?\)', '', exc_type))  # Remove parentheses and content
-            if isinstance(stmt, (ast.Yield, ast.YieldFrom)):
+                if '(' in exc_type:  # Re-raising a bare name needs no regex pass
+                    exc_type = _PAREN_RE.sub('', exc_type)  # Remove parentheses and content
+                raises.add(exc_type)
+            elif not yields and (stmt_type is ast.Yield or stmt_type is ast.YieldFrom):
                 yields = True
+            stack.extend(ast.iter_child_nodes(stmt))
         
         return {
             'name': node.name,
@@ -63,15 +241,14 @@ class DocstringGenerator:
                 break
         
         if init_method:
-            for stmt in ast.walk(init_method):
-                if isinstance(stmt, ast.Assign):
-                    for target in stmt.targets:
-                        if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name):
-                            if target.value.id == 'self':
-                                attr_type = "Any"
-                                if hasattr(stmt, 'annotation') and stmt.annotation:
-                                    attr_type = ast.unparse(stmt.annotation)
-                                attributes.append((target.attr, attr_type))
+            for stmt in _iter_assigns(init_method.body):
+                for target in stmt.targets:
+                    if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name):
+                        if target.value.id == 'self':
+                            attr_type = "Any"
+                            if hasattr(stmt, 'annotation') and stmt.annotation:
+                                attr_type = ast.unparse(stmt.annotation)
+                            attributes.append((target.attr, attr_type))
         
         # Extract public methods
         for body_item in node.body:
@@ -88,160 +265,156 @@ class DocstringGenerator:
         """Generate docstring based on node type and selected style"""
         if isinstance(node, ast.FunctionDef):
             info = self.extract_function_info(node)
-            return self._format_function_docstring(info)
+            return self._format_function(info)
         elif isinstance(node, ast.ClassDef):
             info = self.extract_class_info(node)
-            return self._format_class_docstring(info)
+            return self._format_class(info)
         return ""
     
-    def _format_function_docstring(self, info: Dict) -> str:
-        """Format function docstring according to selected style"""
+    def _function_summary(self, info: Dict) -> List[str]:
+        """Start a function docstring with its summary (and description, if any)"""
         short_desc = f"{info['name']} function."
         long_desc = ""
         
-        if self.style == 'google':
-            sections = [f"{short_desc}\n"]
-            if long_desc:
-                sections.append(f"{long_desc}\n")
-            
-            if info['args']:
-                sections.append("Args:")
-                for arg_name, arg_type in info['args']:
-                    sections.append(f"    {arg_name} ({arg_type}): TODO: describe argument")
-                sections.append("")
-            
-            if info['yields']:
-                sections.append("Yields:")
-                sections.append(f"    {info['returns']}: TODO: describe yielded value\n")
-            elif info['returns'] != "None":
-                sections.append("Returns:")
-                sections.append(f"    {info['returns']}: TODO: describe return value\n")
-            
-            if info['raises']:
-                sections.append("Raises:")
-                for exc in info['raises']:
-                    sections.append(f"    {exc}: TODO: describe when this exception is raised")
-            
-            return "\n".join(sections)
-        
-        elif self.style == 'numpy':
-            sections = [f"{short_desc}\n"]
-            if long_desc:
-                sections.append(f"{long_desc}\n")
-            
-            if info['args']:
-                sections.append("Parameters")
-                sections.append("----------")
-                for arg_name, arg_type in info['args']:
-                    sections.append(f"{arg_name} : {arg_type}")
-                    sections.append("    TODO: describe parameter")
-                sections.append("")
-            
-            if info['yields']:
-                sections.append("Yields")
-                sections.append("------")
-                sections.append(f"{info['returns']}")
-                sections.append("    TODO: describe yielded value\n")
-            elif info['returns'] != "None":
-                sections.append("Returns")
-                sections.append("-------")
-                sections.append(f"{info['returns']}")
-                sections.append("    TODO: describe return value\n")
-            
-            if info['raises']:
-                sections.append("Raises")
-                sections.append("------")
-                for exc in info['raises']:
-                    sections.append(f"{exc}")
-                    sections.append("    TODO: describe exception\n")
-            
-            return "\n".join(sections)
-        
-        # reST style
-        sections = [f"{short_desc}\n"]
+        # Each section is built as one contiguous block, then the blocks are joined once
+        sections = [short_desc + "\n"]
         if long_desc:
-            sections.append(f"{long_desc}\n")
+            sections.append(long_desc + "\n")
+        return sections
+    
+    def _format_function_google(self, info: Dict) -> str:
+        """Format a Google style function docstring"""
+        sections = self._function_summary(info)
+        if info['args']:
+            sections.append("Args:\n" + "\n".join(
+                ["    %s (%s): TODO: describe argument" % arg for arg in info['args']]
+            ) + "\n")
+        
+        if info['yields']:
+            sections.append("Yields:\n    %s: TODO: describe yielded value\n" % info['returns'])
+        elif info['returns'] != "None":
+            sections.append("Returns:\n    %s: TODO: describe return value\n" % info['returns'])
+        
+        if info['raises']:
+            sections.append("Raises:\n" + "\n".join(
+                ["    %s: TODO: describe when this exception is raised" % exc for exc in info['raises']]
+            ))
+        
+        return "\n".join(sections)
+    
+    def _format_function_numpy(self, info: Dict) -> str:
+        """Format a NumPy style function docstring"""
+        sections = self._function_summary(info)
+        if info['args']:
+            sections.append(_NUMPY_PARAMS_HDR + "\n".join(
+                itertools.starmap(_NUMPY_PARAM_ROW, info['args'])
+            ) + "\n")
+        
+        if info['yields']:
+            sections.append("Yields\n------\n%s\n    TODO: describe yielded value\n" % info['returns'])
+        elif info['returns'] != "None":
+            sections.append("Returns\n-------\n%s\n    TODO: describe return value\n" % info['returns'])
         
+        if info['raises']:
+            sections.append(_NUMPY_RAISES_HDR + "\n".join(
+                map(_NUMPY_RAISES_ROW, info['raises'])
+            ))
+        
+        return "\n".join(sections)
+    
+    def _format_function_rest(self, info: Dict) -> str:
+        """Format a reST style function docstring"""
+        sections = self._function_summary(info)
         if info['args']:
-            sections.append(":param " + ", :param ".join([arg[0] for arg in info['args']]) + ":")
-            for arg_name, arg_type in info['args']:
-                sections.append(f":type {arg_name}: {arg_type}")
+            sections.append(":param " + ", :param ".join([arg[0] for arg in info['args']]) + ":\n" + "\n".join(
+                [":type %s: %s" % arg for arg in info['args']]
+            ))
         
         if info['yields']:
-            sections.append(f":yields: {info['returns']} - TODO: describe yielded value")
+            sections.append(":yields: %s - TODO: describe yielded value" % info['returns'])
         elif info['returns'] != "None":
-            sections.append(f":return: TODO: describe return value")
-            sections.append(f":rtype: {info['returns']}")
+            sections.append(":return: TODO: describe return value\n:rtype: %s" % info['returns'])
         
         for exc in info['raises']:
-            sections.append(f":raises {exc}: TODO: describe exception")
+            sections.append(":raises %s: TODO: describe exception" % exc)
         
         return "\n".join(sections)
     
-    def _format_class_docstring(self, info: Dict) -> str:
-        """Format class docstring according to selected style"""
+    def _class_summary(self, info: Dict) -> List[str]:
+        """Start a class docstring with its summary (and description, if any)"""
         short_desc = f"{info['name']} class."
         long_desc = ""
         
-        if self.style == 'google':
-            sections = [f"{short_desc}\n"]
-            if long_desc:
-                sections.append(f"{long_desc}\n")
-            
-            if info['attributes']:
-                sections.append("Attributes:")
-                for attr_name, attr_type in info['attributes']:
-                    sections.append(f"    {attr_name} ({attr_type}): TODO: describe attribute")
-                sections.append("")
-            
-            if info['methods']:
-                sections.append("Methods:")
-                for method in info['methods']:
-                    sections.append(f"    {method}(): TODO: describe method")
-            
-            return "\n".join(sections)
-        
-        elif self.style == 'numpy':
-            sections = [f"{short_desc}\n"]
-            if long_desc:
-                sections.append(f"{long_desc}\n")
-            
-            if info['attributes']:
-                sections.append("Attributes")
-                sections.append("----------")
-                for attr_name, attr_type in info['attributes']:
-                    sections.append(f"{attr_name} : {attr_type}")
-                    sections.append("    TODO: describe attribute")
-                sections.append("")
-            
-            if info['methods']:
-                sections.append("Methods")
-                sections.append("-------")
-                for method in info['methods']:
-                    sections.append(f"{method}()")
-                    sections.append("    TODO: describe method")
-            
-            return "\n".join(sections)
-        
-        # reST style
-        sections = [f"{short_desc}\n"]
+        sections = [short_desc + "\n"]
         if long_desc:
-            sections.append(f"{long_desc}\n")
+            sections.append(long_desc + "\n")
+        return sections
+    
+    def _format_class_google(self, info: Dict) -> str:
+        """Format a Google style class docstring"""
+        sections = self._class_summary(info)
+        if info['attributes']:
+            sections.append("Attributes:\n" + "\n".join(
+                ["    %s (%s): TODO: describe attribute" % attr for attr in info['attributes']]
+            ) + "\n")
+        
+        if info['methods']:
+            sections.append("Methods:\n" + "\n".join(
+                ["    %s(): TODO: describe method" % method for method in info['methods']]
+            ))
         
+        return "\n".join(sections)
+    
+    def _format_class_numpy(self, info: Dict) -> str:
+        """Format a NumPy style class docstring"""
+        sections = self._class_summary(info)
+        if info['attributes']:
+            sections.append(_NUMPY_ATTRS_HDR + "\n".join(
+                itertools.starmap(_NUMPY_ATTR_ROW, info['attributes'])
+            ) + "\n")
+        
+        if info['methods']:
+            sections.append(_NUMPY_METHODS_HDR + "\n".join(
+                map(_NUMPY_METHOD_ROW, info['methods'])
+            ))
+        
+        return "\n".join(sections)
+    
+    def _format_class_rest(self, info: Dict) -> str:
+        """Format a reST style class docstring"""
+        sections = self._class_summary(info)
         if info['attributes']:
-            sections.append("Attributes:")
-            for attr_name, attr_type in info['attributes']:
-                sections.append(f":ivar {attr_name}: TODO: describe attribute")
-                sections.append(f":vartype {attr_name}: {attr_type}")
+            sections.append("Attributes:\n" + "\n".join(
+                [":ivar %s: TODO: describe attribute\n:vartype %s: %s" % (name, name, attr_type)
+                 for name, attr_type in info['attributes']]
+            ))
         
         return "\n".join(sections)
 
+@functools.lru_cache(maxsize=8)
+def _get_generator(style: str) -> DocstringGenerator:
+    """Return a shared DocstringGenerator per style (generators hold no per-file state)"""
+    return DocstringGenerator(style)
+
 class DocstringValidator:
     @staticmethod
     def validate_file(file_path: str) -> List[Dict]:
         """Validate docstrings against PEP 257 using pydocstyle"""
+        # Read the way pydocstyle.check does, then share its in-memory checker path
+        with tokenize.open(file_path) as f:
+            source = f.read()
+        return DocstringValidator.violations_to_dicts(DocstringValidator._check_source(source, file_path))
+    
+    @staticmethod
+    def validate_source(source: str) -> List[Dict]:
+        """Validate docstrings in source text against PEP 257, without touching disk"""
+        return DocstringValidator.violations_to_dicts(DocstringValidator._check_source(source))
+    
+    @staticmethod
+    def violations_to_dicts(violations) -> List[Dict]:
+        """Convert pydocstyle errors into the plain dicts used in reports"""
         results = []
-        for error in pydocstyle.check([file_path]):
+        for error in violations:
             results.append({
                 'line': error.line,
                 'code': error.code,
@@ -251,72 +424,64 @@ class DocstringValidator:
         return results
     
     @staticmethod
-    def analyze_code_quality(file_content: str) -> Dict:
+    def _check_source(file_content: str, filename: str = '<memory>') -> List:
+        """Run pydocstyle's PEP 257 checks over source text, without a temporary file"""
+        violations = []
+        # Same steps as pydocstyle.check, minus writing the source to disk and reading it back
+        source = file_content.replace('\r\n', '\n').replace('\r', '\n')
+        try:
+            for error in _Pep257Checker().check_source(source, filename):
+                if getattr(error, 'code', None) in _PEP257_CODES:
+                    violations.append(error)
+        except (AllError, ParseError) as e:
+            violations.append(e)
+        except tokenize.TokenError:
+            violations.append(SyntaxError(f'invalid syntax in file {filename}'))
+        except Exception as e:
+            print(f"Warning: Validation error: {e}", file=sys.stderr)
+        return violations
+    
+    @staticmethod
+    def analyze_code_quality(file_content: str, precomputed_violations: Optional[List] = None,
+                             precomputed_tree: Optional[ast.AST] = None) -> Dict:
         """Analyze code quality including coverage and compliance metrics"""
-        tree = ast.parse(file_content)
+        cache_key = _ContentCache.key(file_content)
+        cached = _QUALITY_CACHE.get(cache_key)
+        if cached is not None:
+            return _copy_report(cached)
         
-        # Count functions and classes
-        functions = []
-        classes = []
+        # The tree is only read here, so a caller's parse of this content can be shared
+        tree = precomputed_tree if precomputed_tree is not None else ast.parse(file_content)
         
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                functions.append(node)
-            elif isinstance(node, ast.ClassDef):
-                classes.append(node)
+        # Count functions and classes, and which of them are documented, in one pass
+        collector = _DefinitionCollector()
+        collector.visit(tree)
         
-        total_functions = len(functions)
-        total_classes = len(classes)
+        total_functions = collector.total_functions
+        total_classes = collector.total_classes
         total_items = total_functions + total_classes
         
-        # Get documented items
-        documented_functions = 0
-        documented_classes = 0
-        undocumented_functions = []
-        undocumented_classes = []
-        
-        for node in functions:
-            docstring = ast.get_docstring(node)
-            if docstring and len(docstring.strip()) > 0:
-                documented_functions += 1
-            else:
-                undocumented_functions.append(node.name)
-        
-        for node in classes:
-            docstring = ast.get_docstring(node)
-            if docstring and len(docstring.strip()) > 0:
-                documented_classes += 1
-            else:
-                undocumented_classes.append(node.name)
+        documented_functions = total_functions - len(collector.undocumented_functions)
+        documented_classes = total_classes - len(collector.undocumented_classes)
+        undocumented_functions = collector.undocumented_functions
+        undocumented_classes = collector.undocumented_classes
         
         documented_items = documented_functions + documented_classes
         undocumented_items = (total_functions - documented_functions) + (total_classes - documented_classes)
         coverage_percentage = round(documented_items / total_items * 100, 1) if total_items > 0 else 0
         
-        # Get compliance data - WINDOWS-SAFE TEMP FILE HANDLING
-        violations = []
-        fd, tmp_path = tempfile.mkstemp(suffix='.py', text=True)
-        try:
-            # Write content with explicit UTF-8 encoding
-            with os.fdopen(fd, 'w', encoding='utf-8') as tmp:
-                tmp.write(file_content)
-            # File is CLOSED before validation (critical for Windows)
-            violations = list(pydocstyle.check([tmp_path]))
-        except Exception as e:
-            print(f"Warning: Validation error: {e}", file=sys.stderr)
-        finally:
-            # Always clean up temp file - suppress errors if already gone
-            try:
-                os.unlink(tmp_path)
-            except (OSError, FileNotFoundError):
-                pass
+        # Get compliance data, unless the caller already ran pydocstyle on this content
+        if precomputed_violations is not None:
+            violations = list(precomputed_violations)
+        else:
+            violations = DocstringValidator._check_source(file_content)
         
         violation_count = len(violations)
         
         # Calculate compliance percentage (prevent negative values)
         compliance_percentage = max(0, min(100, round((total_items - violation_count) / total_items * 100, 1))) if total_items > 0 else 0
         
-        return {
+        result = {
             'total_functions': total_functions,
             'total_classes': total_classes,
             'documented_items': documented_items,
@@ -331,20 +496,59 @@ class DocstringValidator:
             'violation_count': violation_count,
             'violations': violations
         }
+        _QUALITY_CACHE.put(cache_key, result)
+        return _copy_report(result)
 
 class CodeInstrumentor:
     @staticmethod
-    def add_docstrings(file_content: str, style: str = 'google') -> str:
-        """Add docstrings to all functions and classes in the code"""
-        tree = ast.parse(file_content)
-        generator = DocstringGenerator(style)
+    def add_docstrings(file_content: str, style: str = 'google',
+                       precomputed_tree: Optional[ast.AST] = None) -> str:
+        """Add docstrings to all functions and classes in the code
+        
+        A precomputed_tree is modified in place, so pass one only when it is not needed afterwards.
+        """
+        cache_key = _ContentCache.key(file_content, style)
+        cached = _INSTRUMENT_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        tree = precomputed_tree if precomputed_tree is not None else ast.parse(file_content)
+        CodeInstrumentor._insert_docstrings(tree, style)
+        
+        instrumented = ast.unparse(tree)
+        _INSTRUMENT_CACHE.put(cache_key, instrumented)
+        return instrumented
+    
+    @staticmethod
+    def add_docstrings_with_tree(file_content: str, style: str = 'google',
+                                 precomputed_tree: Optional[ast.AST] = None) -> Tuple[str, ast.AST]:
+        """Add docstrings like add_docstrings, also returning the instrumented tree
+        
+        The tree matches parsing the returned source, so callers need not parse it again.
+        """
+        tree = precomputed_tree if precomputed_tree is not None else ast.parse(file_content)
+        CodeInstrumentor._insert_docstrings(tree, style)
+        ast.fix_missing_locations(tree)
+        
+        cache_key = _ContentCache.key(file_content, style)
+        instrumented = _INSTRUMENT_CACHE.get(cache_key)
+        if instrumented is None:
+            instrumented = ast.unparse(tree)
+            _INSTRUMENT_CACHE.put(cache_key, instrumented)
+        return instrumented, tree
+    
+    @staticmethod
+    def _insert_docstrings(tree: ast.AST, style: str) -> None:
+        """Insert generated docstrings into the tree's undocumented functions and classes"""
+        generator = _get_generator(style)
         
         # Transform AST to add docstrings
         for node in ast.walk(tree):
             if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
                 # Skip if already has a substantial docstring
-                existing_doc = ast.get_docstring(node)
-                if existing_doc and len(existing_doc.strip()) > 20:
+                # Measured as ast.get_docstring would return it, so indentation doesn't count
+                existing_doc = _raw_docstring(node)
+                if existing_doc and len(inspect.cleandoc(existing_doc).strip()) > 20:
                     continue
                 
                 # Generate and add new docstring
@@ -353,112 +557,237 @@ class CodeInstrumentor:
                     # Create AST node for docstring
                     doc_node = ast.Expr(value=ast.Constant(value=docstring.strip()))
                     node.body.insert(0, doc_node)
-        
-        return astor.to_source(tree)
     
     @staticmethod
-    def process_directory(directory_path: str, style: str = 'google') -> Dict:
-        """Process all Python files in a directory"""
-        results = {}
-        total_functions = 0
-        total_classes = 0
-        total_documented = 0
-        total_undocumented = 0
-        total_items = 0
-        total_violations = 0
-        
-        original_summary = {
-            'total_functions': 0,
-            'total_classes': 0,
-            'documented_items': 0,
-            'undocumented_items': 0,
-            'total_items': 0,
-            'coverage_percentage': 0,
-            'compliance_percentage': 0,
-            'violation_count': 0
-        }
-        
-        for root, _, files in os.walk(directory_path):
-            for file in files:
-                if file.endswith('.py'):
-                    file_path = os.path.join(root, file)
-                    # FIXED: Added encoding='utf-8' when reading files
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    # Analyze original code first
-                    original_quality = DocstringValidator.analyze_code_quality(content)
-                    
-                    # Add docstrings
-                    instrumented_code = CodeInstrumentor.add_docstrings(content, style)
-                    
-                    # Analyze instrumented code - WINDOWS-SAFE TEMP FILE HANDLING
-                    fd, tmp_path = tempfile.mkstemp(suffix='.py', text=True)
-                    try:
-                        with os.fdopen(fd, 'w', encoding='utf-8') as tmp:
-                            tmp.write(instrumented_code)
-                        instrumented_quality = DocstringValidator.analyze_code_quality(instrumented_code)
-                        validation_results = DocstringValidator.validate_file(tmp_path)
-                    finally:
-                        try:
-                            os.unlink(tmp_path)
-                        except (OSError, FileNotFoundError):
-                            pass
-                    
-                    # Update totals for original code
-                    original_summary['total_functions'] += original_quality['total_functions']
-                    original_summary['total_classes'] += original_quality['total_classes']
-                    original_summary['documented_items'] += original_quality['documented_items']
-                    original_summary['undocumented_items'] += original_quality['undocumented_items']
-                    original_summary['total_items'] += original_quality['total_items']
-                    original_summary['violation_count'] += original_quality['violation_count']
-                    
-                    # Update totals for instrumented code
-                    total_functions += instrumented_quality['total_functions']
-                    total_classes += instrumented_quality['total_classes']
-                    total_documented += instrumented_quality['documented_items']
-                    total_undocumented += instrumented_quality['undocumented_items']
-                    total_items += instrumented_quality['total_items']
-                    total_violations += instrumented_quality['violation_count']
-                    
-                    # Collect results
-                    results[file_path] = {
-                        'original_code': content,
-                        'instrumented_code': instrumented_code,
-                        'original_quality': original_quality,
-                        'instrumented_quality': instrumented_quality,
-                        'validation': validation_results,
-                        'original_violations': original_quality['violations']
-                    }
-        
-        # Calculate overall metrics for original code
-        if original_summary['total_items'] > 0:
-            original_summary['coverage_percentage'] = round(
-                original_summary['documented_items'] / original_summary['total_items'] * 100, 1
-            )
-            original_summary['compliance_percentage'] = round(
-                (original_summary['total_items'] - original_summary['violation_count']) / 
-                original_summary['total_items'] * 100, 1
-            )
-        
-        # Calculate overall metrics for instrumented code
-        overall_coverage = round(total_documented / total_items * 100, 1) if total_items > 0 else 0
-        overall_compliance = round((total_items - total_violations) / total_items * 100, 1) if total_items > 0 else 0
-        
-        return {
-            'file_results': results,
-            'original_summary': original_summary,
-            'instrumented_summary': {
-                'total_functions': total_functions,
-                'total_classes': total_classes,
-                'documented_items': total_documented,
-                'undocumented_items': total_undocumented,
-                'total_items': total_items,
-                'coverage_percentage': overall_coverage,
-                'compliance_percentage': overall_compliance,
-                'violation_count': total_violations
-            }
-        }
+    def process_directory(directory_path: str, style: str = 'google', cache_path: Optional[str] = None,
+                          executor: Optional[Executor] = None) -> Dict:
+        """Process all Python files in a directory
+        
+        Given a cache_path, results for files whose size and mtime match the previous run are
+        loaded from that JSON file instead of being recomputed, and the file is then updated.
+        """
+        files = list(_iter_py_files(directory_path))
+        file_paths = [path for path, _ in files]
+        
+        # Files whose size and mtime match the last run are not processed again
+        cache = _load_result_cache(cache_path) if cache_path else {}
+        keys = [f"{style}:{os.path.abspath(path)}" for path in file_paths]
+        stamps = [[st.st_mtime_ns, st.st_size] for _, st in files]
+        file_results = [None] * len(files)
+        for i, (key, stamp) in enumerate(zip(keys, stamps)):
+            entry = cache.get(key)
+            if entry is not None and entry.get('stamp') == stamp:
+                file_results[i] = _restore_result(entry['result'], file_paths[i])
+        pending = [i for i, result in enumerate(file_results) if result is None]
+        
+        total_bytes = sum(stamps[i][1] for i in pending)
+        processed = _run_all(_process_one_file, [file_paths[i] for i in pending], style, executor, total_bytes)
+        for i, file_result in zip(pending, processed):
+            file_results[i] = file_result
+        if cache_path and pending:
+            for i in pending:
+                cache[keys[i]] = {'stamp': stamps[i], 'result': _cacheable_result(file_results[i])}
+            _save_result_cache(cache_path, cache)
+        
+        return _summarize(file_paths, file_results)
+    
+    @staticmethod
+    def process_sources(sources: Dict[str, str], style: str = 'google',
+                        executor: Optional[Executor] = None) -> Dict:
+        """Process in-memory Python sources keyed by name, e.g. the members of an uploaded archive
+        
+        Returns the same structure as process_directory, with file_results keyed by name.
+        """
+        names = list(sources)
+        
+        # Identical sources are processed once; every further name gets its own copy of the result
+        by_content = {}
+        for name in names:
+            by_content.setdefault(sources[name], []).append(name)
+        
+        total_bytes = sum(map(len, by_content))
+        processed = _run_all(_process_source, list(by_content), style, executor, total_bytes)
+        file_results = dict.fromkeys(names)
+        for group, file_result in zip(by_content.values(), processed):
+            file_results[group[0]] = file_result
+            for name in group[1:]:
+                file_results[name] = _copy_result(file_result)
+        
+        return _summarize(names, [file_results[name] for name in names])
+
+# Less source than this (about a third of a second of work) is processed serially,
+# since starting workers that each import pydocstyle would cost more than it saves
+PARALLEL_MIN_BYTES = 64 * 1024
+
+def _run_all(worker, items: List, style: str, executor: Optional[Executor], total_bytes: int) -> List[Dict]:
+    """Run worker(item, style) for every item, over processes when there are several large enough"""
+    if len(items) < 2 or total_bytes < PARALLEL_MIN_BYTES:
+        return [worker(item, style) for item in items]
+    # A long-lived caller (e.g. the Streamlit app) can pass its own pool to keep workers warm
+    if executor is not None:
+        return list(executor.map(worker, items, [style] * len(items)))
+    workers = min(os.cpu_count() or 1, len(items))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(worker, items, [style] * len(items)))
+
+# Per-file quality counts that add up into a project summary, in summary order
+_SUMMARY_COUNTS = ('total_functions', 'total_classes', 'documented_items',
+                   'undocumented_items', 'total_items', 'violation_count')
+_get_counts = operator.itemgetter(*_SUMMARY_COUNTS)
+
+def _rollup(qualities: List[Dict]) -> Dict:
+    """Add up per-file quality counts into one summary with project-wide percentages"""
+    # One C-level sum per column instead of six dict updates per file
+    sums = [sum(column) for column in zip(*map(_get_counts, qualities))] or [0] * len(_SUMMARY_COUNTS)
+    functions, classes, documented, undocumented, items, violations = sums
+    return {
+        'total_functions': functions,
+        'total_classes': classes,
+        'documented_items': documented,
+        'undocumented_items': undocumented,
+        'total_items': items,
+        'coverage_percentage': round(documented / items * 100, 1) if items > 0 else 0,
+        'compliance_percentage': round((items - violations) / items * 100, 1) if items > 0 else 0,
+        'violation_count': violations
+    }
+
+def _summarize(names: List[str], file_results: List[Dict]) -> Dict:
+    """Total per-file results into the project summaries returned by process_directory"""
+    return {
+        'file_results': dict(zip(names, file_results)),
+        'original_summary': _rollup([result['original_quality'] for result in file_results]),
+        'instrumented_summary': _rollup([result['instrumented_quality'] for result in file_results])
+    }
+
+def _iter_py_files(directory_path: str):
+    """Yield (path, stat) for .py files top-down like os.walk, using os.scandir DirEntry info"""
+    subdirs = []
+    with os.scandir(directory_path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.endswith('.py') and entry.is_file():
+                yield entry.path, entry.stat()
+    for subdir in subdirs:
+        yield from _iter_py_files(subdir)
+
+def _copy_result(file_result: Dict) -> Dict:
+    """Copy a file result deep enough that changing it leaves the original alone"""
+    original_quality = _copy_report(file_result['original_quality'])
+    return {
+        **file_result,
+        'original_quality': original_quality,
+        'instrumented_quality': _copy_report(file_result['instrumented_quality']),
+        'validation': [dict(violation) for violation in file_result['validation']],
+        # An alias of original_quality['violations'], as _process_source returns it
+        'original_violations': original_quality['violations'],
+    }
+
+class Violation(NamedTuple):
+    """Picklable snapshot of a pydocstyle error"""
+    line: int
+    code: str
+    message: str
+    source: Union[str, bool]  # pydocstyle's Error.source is False unless the source was captured
+
+def _snapshot_violations(quality: Dict) -> Dict:
+    """Replace pydocstyle errors in a quality report with Violation tuples"""
+    quality['violations'] = [
+        Violation(error.line, error.code, error.message, error.source)
+        for error in quality['violations']
+    ]
+    return quality
+
+def _process_one_file(file_path: str, style: str) -> Dict:
+    """Analyze, instrument and validate one file (runs in a worker process)"""
+    # FIXED: Added encoding='utf-8' when reading files
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return _process_source(f.read(), style)
+
+def _process_source(content: str, style: str) -> Dict:
+    """Analyze, instrument and validate one source (runs in a worker process)"""
+    # Parsed once: analysis only reads the tree, then instrumentation consumes it
+    tree = ast.parse(content)
+    
+    # Analyze original code first
+    original_quality = _snapshot_violations(
+        DocstringValidator.analyze_code_quality(content, precomputed_tree=tree)
+    )
+    
+    # Add docstrings, keeping the instrumented tree so it need not be parsed back
+    instrumented_code, tree = CodeInstrumentor.add_docstrings_with_tree(content, style, precomputed_tree=tree)
+    
+    # Analyze instrumented code, running pydocstyle on it only once
+    instrumented_violations = DocstringValidator._check_source(instrumented_code)
+    instrumented_quality = _snapshot_violations(DocstringValidator.analyze_code_quality(
+        instrumented_code, precomputed_violations=instrumented_violations, precomputed_tree=tree
+    ))
+    validation_results = DocstringValidator.violations_to_dicts(instrumented_violations)
+    
+    return {
+        'original_code': content,
+        'instrumented_code': instrumented_code,
+        'original_quality': original_quality,
+        'instrumented_quality': instrumented_quality,
+        'validation': validation_results,
+        'original_violations': original_quality['violations']
+    }
+
+# Format of the opt-in process_directory result cache: entries keyed by style and path,
+# stamped with mtime and size
+RESULT_CACHE_VERSION = 2
+
+@functools.lru_cache(maxsize=1)
+def _result_cache_version() -> List:
+    """Version tag for cached results; editing this module or upgrading pydocstyle invalidates them"""
+    from pydocstyle import __version__ as pydocstyle_version
+    with open(__file__, 'rb') as f:
+        code_digest = hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+    return [RESULT_CACHE_VERSION, pydocstyle_version, code_digest]
+
+def _load_result_cache(cache_path: str) -> Dict:
+    """Load a process_directory result cache, starting empty if it is missing or stale"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == _result_cache_version():
+            return data.get('entries', {})
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {}
+
+def _save_result_cache(cache_path: str, entries: Dict) -> None:
+    """Write the result cache back, dropping entries for files that no longer exist"""
+    entries = {
+        key: entry for key, entry in entries.items()
+        if os.path.exists(key.split(':', 1)[1])
+    }
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': _result_cache_version(), 'entries': entries}, f)
+    except OSError as e:
+        print(f"Warning: Failed to write cache {cache_path}: {e}", file=sys.stderr)
+
+def _cacheable_result(file_result: Dict) -> Dict:
+    """A file result without what is cheap to get back: the source on disk and an alias"""
+    return {
+        key: value for key, value in file_result.items()
+        if key != 'original_code' and key != 'original_violations'
+    }
+
+def _restore_result(file_result: Dict, file_path: str) -> Optional[Dict]:
+    """Rebuild a cached (JSON-decoded) file result, or None if the file can't be re-read"""
+    try:
+        # Put back first, where _process_source has it
+        file_result = {'original_code': get_file_content(file_path), **file_result}
+    except (OSError, UnicodeDecodeError):
+        return None
+    for quality_key in ('original_quality', 'instrumented_quality'):
+        quality = file_result[quality_key]
+        quality['violations'] = list(map(Violation._make, quality['violations']))
+    file_result['original_violations'] = file_result['original_quality']['violations']
+    return file_result
 
 # Utility functions
 def get_file_content(file_path: str) -> str:
@@ -512,20 +841,22 @@ PEP-257 Violations: {quality_report['violation_count']}
     return report
 
 def generate_compliance_report(violations: List, title: str = "PEP-257 Compliance Report") -> str:
-    """Generate a formatted compliance report"""
+    """Generate a formatted compliance report from violation dicts or Violation tuples"""
     if not violations:
         return f"{title}\n{'='*len(title)}\n\n✅ No compliance issues found!\n"
     
-    report = f"{title}\n{'='*len(title)}\n\n"
-    report += f"Found {len(violations)} compliance issues:\n\n"
-    
+    # One part per issue, joined once; repeated += would recopy the growing report
+    parts = [f"{title}\n{'='*len(title)}\n\nFound {len(violations)} compliance issues:\n\n"]
+    append = parts.append
     for i, issue in enumerate(violations, 1):
-        report += f"Issue #{i}:\n"
-        report += f"  Line: {issue['line']}\n"
-        report += f"  Code: {issue['code']}\n"
-        report += f"  Message: {issue['message']}\n"
-        if 'source' in issue:
-            report += f"  Source: {issue['source']}\n"
-        report += "\n"
-    
-    return report
\ No newline at end of file
+        if isinstance(issue, dict):
+            text = (f"Issue #{i}:\n  Line: {issue['line']}\n  Code: {issue['code']}\n"
+                    f"  Message: {issue['message']}\n")
+            if 'source' in issue:
+                text += f"  Source: {issue['source']}\n"
+            append(text + "\n")
+        else:
+            line, code, message, source = issue
+            append(f"Issue #{i}:\n  Line: {line}\n  Code: {code}\n  Message: {message}\n  Source: {source}\n\n")
+    
+    return "".join(parts)
\ No newline at end of file
@@ -1,16 +1,19 @@
 import streamlit as st
+import atexit
+import html
 import os
-import tempfile
-import zipfile
-import io
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from m2_core import (
     DocstringGenerator,
     DocstringValidator,
     CodeInstrumentor,
+    Violation,
     generate_before_coverage_report,
     generate_after_coverage_report,
     generate_compliance_report,
 )
+from docugenius_zip import build_zip
 
 # ─────────────────────────────────────────────
 # PAGE CONFIG
@@ -25,7 +28,7 @@ st.set_page_config(
 # ─────────────────────────────────────────────
 # CUSTOM CSS
 # ─────────────────────────────────────────────
-st.markdown("""
+_CSS = """
 <style>
     /* ── Global ── */
     html, body, [class*="css"] { font-family: 'Segoe UI', sans-serif; }
@@ -92,6 +95,9 @@ st.markdown("""
     }
     .stDownloadButton > button:hover { background: #6d28d9; }
 
+    /* ── Separators ── */
+    .sep { border-top: 1px solid #333; margin: 1rem 0; }
+
     /* ── Sidebar ── */
     section[data-testid="stSidebar"] { background: #1e1b4b; }
     section[data-testid="stSidebar"] * { color: #e5e7eb !important; }
@@ -100,7 +106,35 @@ st.markdown("""
     section[data-testid="stSidebar"] h2,
     section[data-testid="stSidebar"] h3 { color: #ffffff !important; }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+@st.cache_resource
+def _inject_css():
+    # Built once per server; on later reruns Streamlit replays the cached element.
+    # It can't be skipped on reruns: elements a rerun doesn't emit are removed.
+    # st.html sends it as is, without a pass through the markdown parser.
+    st.html(_CSS)
+
+
+_inject_css()
+
+# Section separator, styled by the .sep rule above rather than parsed as markdown
+_SEP_HTML = "<div class='sep'></div>"
+
+
+def separator():
+    st.html(_SEP_HTML)
+
+
+_FOOTER = """
+<div style='text-align:center;color:#9ca3af;font-size:0.82rem'>
+  Auto-DocstringGen v1.0.0 &nbsp;·&nbsp; Milestone 4 &nbsp;·&nbsp;
+  <a href="https://peps.python.org/pep-0257/" target="_blank" style="color:#7c3aed">PEP 257</a> &nbsp;·&nbsp;
+  <a href="https://pypi.org/project/docstringsiva/" target="_blank" style="color:#7c3aed">PyPI</a>
+</div>
+"""
+
 
 # ─────────────────────────────────────────────
 # TOOLTIP HELPER
@@ -118,6 +152,21 @@ TOOLTIPS = {
 }
 
 
+# Workers in the shared pool, however many cores the host has
+WORKER_POOL_SIZE = min(4, os.cpu_count() or 1)
+
+
+@st.cache_resource
+def _worker_pool():
+    """Process pool shared by all sessions, so ZIP uploads don't pay for worker start-up.
+
+    The pool is shut down when the server exits.
+    """
+    pool = ProcessPoolExecutor(max_workers=WORKER_POOL_SIZE)
+    atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+    return pool
+
+
 # ─────────────────────────────────────────────
 # SESSION STATE
 # ─────────────────────────────────────────────
@@ -127,10 +176,13 @@ _STATE_KEYS = [
     "validation_results", "original_violations",
     "original_coverage_report", "instrumented_coverage_report",
     "original_compliance_report", "instrumented_compliance_report",
+    "zip_cache",
 ]
-for _k in _STATE_KEYS:
-    if _k not in st.session_state:
-        st.session_state[_k] = None
+# Only the first run of a session needs to seed the keys
+if "_state_initialized" not in st.session_state:
+    for _k in _STATE_KEYS:
+        st.session_state.setdefault(_k, None)
+    st.session_state["_state_initialized"] = True
 
 
 # ─────────────────────────────────────────────
@@ -144,19 +196,58 @@ def coverage_color(pct: float) -> str:
     return "compliance-bad"
 
 
+_PROGRESS_BAR_TPL = (
+    '<div style="margin:6px 0">'
+    '<div style="display:flex;justify-content:space-between;font-size:0.82rem;color:#374151;margin-bottom:3px">'
+    '<span>{label}</span><span style="font-weight:700;color:{color}">{pct}%</span>'
+    '</div>'
+    '<div style="background:#e5e7eb;border-radius:6px;height:10px">'
+    '<div style="width:{width}%;background:{color};border-radius:6px;height:10px"></div>'
+    '</div>'
+    '</div>'
+).format
+
+
+def progress_bar_html(pct: float, label: str) -> str:
+    """HTML for a labelled progress bar with colour coding."""
+    color = "#16a34a" if pct >= 80 else ("#f59e0b" if pct >= 50 else "#dc2626")
+    return _PROGRESS_BAR_TPL(label=label, color=color, pct=pct, width=min(pct, 100))
+
+
 def progress_bar(pct: float, label: str):
     """Render a labelled progress bar with colour coding."""
-    color = "#16a34a" if pct >= 80 else ("#f59e0b" if pct >= 50 else "#dc2626")
-    st.markdown(f"""
-    <div style="margin:6px 0">
-      <div style="display:flex;justify-content:space-between;font-size:0.82rem;color:#374151;margin-bottom:3px">
-        <span>{label}</span><span style="font-weight:700;color:{color}">{pct}%</span>
-      </div>
-      <div style="background:#e5e7eb;border-radius:6px;height:10px">
-        <div style="width:{min(pct,100)}%;background:{color};border-radius:6px;height:10px"></div>
-      </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.html(progress_bar_html(pct, label))
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _unified_diff(original: str, instrumented: str, titles: tuple) -> str:
+    """Unified diff between the original and instrumented source."""
+    import difflib  # Only needed once a file has been processed
+    # Two lines of context: an inserted docstring reads fine with its def line above it
+    return "\n".join(difflib.unified_diff(
+        original.splitlines(), instrumented.splitlines(),
+        fromfile=titles[0], tofile=titles[1], lineterm="", n=2,
+    ))
+
+
+def code_comparison(original: str, instrumented: str, key: str,
+                    titles=("Original", "Instrumented")):
+    """Unified diff of the instrumented source against the original.
+
+    Instrumenting only inserts docstrings, so the diff is a fraction of the
+    two files. Both files in full sit behind a toggle.
+    """
+    diff = _unified_diff(original, instrumented, tuple(titles))
+    if diff:
+        st.code(diff, language="diff")
+    else:
+        st.info("ℹ️ Instrumentation left this file unchanged.")
+
+    if st.toggle("Show full files", key=key):
+        for column, title, code in zip(st.columns(2), titles, (original, instrumented)):
+            with column:
+                st.caption(title)
+                st.code(code, language="python")
 
 
 def metric_card(value, label, color_class=""):
@@ -168,108 +259,210 @@ def metric_card(value, label, color_class=""):
     """
 
 
-def create_zip_from_results(results):
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-        for file_path, data in results["file_results"].items():
-            fname = os.path.basename(file_path)
-            zf.writestr(f"original_{fname}", data["original_code"])
-            zf.writestr(f"instrumented_{fname}", data["instrumented_code"])
-
-            orig_cov = generate_before_coverage_report(data["original_quality"])
-            orig_comp = generate_compliance_report(
-                [{"line": v.line, "code": v.code, "message": v.message, "source": v.source}
-                 for v in data["original_violations"]],
-                "PEP-257 Compliance Report (Before Instrumentation)",
-            )
-            inst_cov  = generate_after_coverage_report(data["instrumented_quality"])
-            inst_comp = generate_compliance_report(
-                data["validation"],
-                "PEP-257 Compliance Report (After Instrumentation)",
-            )
-            zf.writestr(f"coverage_original_{fname}.txt",   orig_cov)
-            zf.writestr(f"compliance_original_{fname}.txt", orig_comp)
-            zf.writestr(f"coverage_instrumented_{fname}.txt",   inst_cov)
-            zf.writestr(f"compliance_instrumented_{fname}.txt", inst_comp)
-
-        os_ = results["original_summary"]
-        is_ = results["instrumented_summary"]
-        summary = f"""
-Auto-DocstringGen · Project Analysis Summary
-=========================================
-
-BEFORE INSTRUMENTATION
------------------------
-Functions  : {os_['total_functions']}
-Classes    : {os_['total_classes']}
-Documented : {os_['documented_items']}
-Undocumented: {os_['undocumented_items']}
-Coverage   : {os_['coverage_percentage']}%
-PEP-257    : {os_['compliance_percentage']}%
-Violations : {os_['violation_count']}
-
-AFTER INSTRUMENTATION
-----------------------
-Functions  : {is_['total_functions']}
-Classes    : {is_['total_classes']}
-Documented : {is_['documented_items']}
-Undocumented: {is_['undocumented_items']}
-Coverage   : {is_['coverage_percentage']}%
-PEP-257    : {is_['compliance_percentage']}%
-Violations : {is_['violation_count']}
-
-IMPROVEMENT
------------
-Coverage   : +{round(is_['coverage_percentage']   - os_['coverage_percentage'],   1)}%
-Compliance : +{round(is_['compliance_percentage'] - os_['compliance_percentage'], 1)}%
+# (label, summary key, suffix) for each row of a project_summary.txt block
+_SUMMARY_FIELDS = [
+    ("Functions",    "total_functions",       ""),
+    ("Classes",      "total_classes",         ""),
+    ("Documented",   "documented_items",      ""),
+    ("Undocumented", "undocumented_items",    ""),
+    ("Coverage",     "coverage_percentage",   "%"),
+    ("PEP-257",      "compliance_percentage", "%"),
+    ("Violations",   "violation_count",       ""),
+]
+
+
+def _summary_rows(summary: dict) -> list:
+    return [f"{label:<11}: {summary[key]}{suffix}" for label, key, suffix in _SUMMARY_FIELDS]
+
+
+def _project_summary(os_: dict, is_: dict) -> str:
+    rows = ["", "Auto-DocstringGen · Project Analysis Summary", "=" * 41, ""]
+    rows += ["BEFORE INSTRUMENTATION", "-" * 23]
+    rows += _summary_rows(os_)
+    rows += ["", "AFTER INSTRUMENTATION", "-" * 22]
+    rows += _summary_rows(is_)
+    rows += [
+        "",
+        "IMPROVEMENT",
+        "-" * 11,
+        f"Coverage   : +{round(is_['coverage_percentage']   - os_['coverage_percentage'],   1)}%",
+        f"Compliance : +{round(is_['compliance_percentage'] - os_['compliance_percentage'], 1)}%",
+        "",
+    ]
+    return "\n".join(rows)
+
+
+def read_source(data: bytes) -> str:
+    """Decode an uploaded source like open(..., encoding="utf-8") would, universal newlines included."""
+    return str(data, "utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def process_source(content: str, style: str) -> dict:
+    """Analyze, instrument and report on one uploaded source, once per (content, style).
+
+    Returns the single-file session state values. pydocstyle's errors can't be
+    pickled into the cache, so both quality reports carry Violation tuples.
+    """
+    import ast
+    # Parsed once: analysis only reads the tree, then instrumentation consumes it
+    tree = ast.parse(content)
+    oq = DocstringValidator.analyze_code_quality(content, precomputed_tree=tree)
+    orig_v = [Violation(v.line, v.code, v.message, v.source) for v in oq["violations"]]
+    oq["violations"] = orig_v
+
+    inst, tree = CodeInstrumentor.add_docstrings_with_tree(content, style, precomputed_tree=tree)
+    iq = DocstringValidator.analyze_code_quality(inst, precomputed_tree=tree)
+    # analyze_code_quality already ran pydocstyle on inst; reuse its findings
+    val = DocstringValidator.violations_to_dicts(iq["violations"])
+    iq["violations"] = [Violation(v.line, v.code, v.message, v.source) for v in iq["violations"]]
+
+    return {
+        "original_quality": oq,
+        "original_coverage_report": generate_before_coverage_report(oq),
+        "original_violations": orig_v,
+        "original_compliance_report": generate_compliance_report(
+            orig_v, "PEP-257 Compliance Report (Before Instrumentation)"
+        ),
+        "instrumented_code": inst,
+        "instrumented_quality": iq,
+        "instrumented_coverage_report": generate_after_coverage_report(iq),
+        "validation_results": val,
+        "instrumented_compliance_report": generate_compliance_report(
+            val, "PEP-257 Compliance Report (After Instrumentation)"
+        ),
+    }
+
+
+# One member for all four reports of a file instead of one each
+_MERGED_REPORTS_TPL = (
+    "=== Coverage (original) ===\n{cov_before}\n"
+    "=== Coverage (instrumented) ===\n{cov_after}\n"
+    "=== PEP-257 compliance (original) ===\n{comp_before}\n"
+    "=== PEP-257 compliance (instrumented) ===\n{comp_after}\n"
+).format
+
+
+def _file_reports(data: dict) -> str:
+    """Coverage and compliance reports for one processed file, before and after, as one text."""
+    return _MERGED_REPORTS_TPL(
+        cov_before=generate_before_coverage_report(data["original_quality"]),
+        comp_before=generate_compliance_report(
+            data["original_violations"],
+            "PEP-257 Compliance Report (Before Instrumentation)",
+        ),
+        cov_after=generate_after_coverage_report(data["instrumented_quality"]),
+        comp_after=generate_compliance_report(
+            data["validation"],
+            "PEP-257 Compliance Report (After Instrumentation)",
+        ),
+    )
+
+
+def _file_members(file_path: str, data: dict) -> list:
+    """One processed file's (name, text) archive members."""
+    fname = os.path.basename(file_path)
+    return [
+        (f"original_{fname}",     data["original_code"]),
+        (f"instrumented_{fname}", data["instrumented_code"]),
+        (f"reports_{fname}.txt",  _file_reports(data)),
+    ]
+
+
+def create_zip_from_results(results) -> bytes:
+    """Build the results archive in memory.
+
+    Reports are formatted here, when an archive is asked for; encoding and
+    writing the archive is left to docugenius_zip.build_zip. The bytes are handed back
+    as is: st.download_button needs the whole payload anyway.
+    """
+    members = [
+        member
+        for path, data in results["file_results"].items()
+        for member in _file_members(path, data)
+    ]
+    members.append(
+        ("project_summary.txt", _project_summary(results["original_summary"], results["instrumented_summary"]))
+    )
+    return build_zip(members)
+
+
+# Static, so it is sent as ready-made HTML rather than parsed as markdown on every toggle
+_ZIP_CONTENTS_HTML = """
+<p>For each processed <code>.py</code> file:</p>
+<ul>
+  <li><code>original_&lt;file&gt;.py</code> — original source</li>
+  <li><code>instrumented_&lt;file&gt;.py</code> — source with generated docstrings</li>
+  <li><code>reports_&lt;file&gt;.txt</code> — coverage and PEP-257 reports, before and after</li>
+</ul>
+<p>Plus a <code>project_summary.txt</code> with overall metrics.</p>
 """
-        zf.writestr("project_summary.txt", summary)
-    zip_buffer.seek(0)
-    return zip_buffer
+
+
+def session_zip(results: dict):
+    """The results ZIP built earlier in this session for these results, or None.
+
+    Held in session state next to the results it was built from, so a rerun
+    finds it by identity without hashing anything.
+    """
+    cached = st.session_state.zip_cache
+    if cached is not None and cached[0] is results:
+        return cached[1]
+    return None
 
 
 # ─────────────────────────────────────────────
 # UI COMPONENTS
 # ─────────────────────────────────────────────
-def display_metrics_comparison(before: dict, after: dict):
-    """Four-column metrics card grid comparing before vs after."""
-    col1, col2, col3, col4 = st.columns(4)
+_SUMMARY_METRICS = ("total_functions", "total_classes", "coverage_percentage", "compliance_percentage")
 
-    with col1:
-        st.markdown(metric_card(before["total_functions"], "Functions (Before)"), unsafe_allow_html=True)
-        st.markdown(metric_card(after["total_functions"],  "Functions (After)"),  unsafe_allow_html=True)
 
-    with col2:
-        st.markdown(metric_card(before["total_classes"], "Classes (Before)"), unsafe_allow_html=True)
-        st.markdown(metric_card(after["total_classes"],  "Classes (After)"),  unsafe_allow_html=True)
+def already_documented(before: dict, after: dict) -> bool:
+    """True when nothing was left to document and instrumentation changed no metric.
 
-    with col3:
-        st.markdown(
-            metric_card(f"{before['coverage_percentage']}%", "Coverage (Before)",
-                        coverage_color(before["coverage_percentage"])),
-            unsafe_allow_html=True,
-        )
-        st.markdown(
-            metric_card(f"{after['coverage_percentage']}%", "Coverage (After)",
-                        coverage_color(after["coverage_percentage"])),
-            unsafe_allow_html=True,
-        )
+    Unchanged metrics alone don't mean complete: definitions the instrumentor
+    skips (e.g. async functions) stay undocumented, and their 0% must still show.
+    """
+    return before["undocumented_items"] == 0 and all(before[k] == after[k] for k in _SUMMARY_METRICS)
+
+
+@st.cache_data(show_spinner=False)
+def _metrics_html(before: tuple, after: tuple) -> str:
+    """Card grid HTML for two _SUMMARY_METRICS tuples, built once per distinct pair."""
+    # The grid puts "before" on the top row
+    cards = []
+    for (functions, classes, coverage, compliance), when in ((before, "Before"), (after, "After")):
+        cards += [
+            metric_card(functions, f"Functions ({when})"),
+            metric_card(classes, f"Classes ({when})"),
+            metric_card(f"{coverage}%", f"Coverage ({when})", coverage_color(coverage)),
+            metric_card(f"{compliance}%", f"PEP-257 ({when})", coverage_color(compliance)),
+        ]
+    return (
+        '<div style="display:grid;grid-template-columns:repeat(4,1fr);gap:12px">'
+        + "".join(cards)
+        + "</div>"
+    )
 
-    with col4:
-        st.markdown(
-            metric_card(f"{before['compliance_percentage']}%", "PEP-257 (Before)",
-                        coverage_color(before["compliance_percentage"])),
-            unsafe_allow_html=True,
-        )
-        st.markdown(
-            metric_card(f"{after['compliance_percentage']}%", "PEP-257 (After)",
-                        coverage_color(after["compliance_percentage"])),
-            unsafe_allow_html=True,
-        )
+
+def display_metrics_comparison(before: dict, after: dict):
+    """Four-column metrics card grid comparing before vs after."""
+    if already_documented(before, after):
+        st.info("✅ Docstrings already complete — no instrumentation needed.")
+        return
+
+    # All eight cards go out as one element, keyed by the few numbers they show
+    st.html(_metrics_html(
+        tuple(before[k] for k in _SUMMARY_METRICS),
+        tuple(after[k] for k in _SUMMARY_METRICS),
+    ))
 
 
 def display_improvement_banner(before: dict, after: dict):
     """Show coverage and compliance delta as st.metric widgets."""
+    if already_documented(before, after):
+        return  # display_metrics_comparison already said so
+
     cov_delta  = round(after["coverage_percentage"]   - before["coverage_percentage"],   1)
     comp_delta = round(after["compliance_percentage"] - before["compliance_percentage"], 1)
 
@@ -293,8 +486,80 @@ def display_improvement_banner(before: dict, after: dict):
         progress_bar(after["compliance_percentage"], "Compliance after instrumentation")
 
 
+_VIOLATION_COLUMNS = ["line", "code", "message", "source"]
+
+VIOLATION_FRAMES_KEPT = 8
+
+_VIOLATION_CARD_TPL = (
+    '<div class="violation-card">'
+    "<b>Line:</b> {line}<br>"
+    "<b>Code:</b> <code>{code}</code><br>"
+    "<b>Message:</b> {message}<br>"
+    "<b>Source:</b> <code>{source}</code>"
+    "</div>"
+).format
+
+
+def _violations_frame(violations: list):
+    """Violations as a DataFrame, with lowercased message/code columns for searching.
+
+    Memoized per list in session state rather than with st.cache_data, which
+    would hash every violation on each rerun. The lists are stored in session
+    state and never mutated, and the memo holds on to each one, so its id
+    can't be reused by a different list while the entry is alive.
+    """
+    memo = st.session_state.setdefault("_violation_frames", {})
+    hit = memo.get(id(violations))
+    if hit is not None and hit[0] is violations:
+        return hit[1]
+
+    import pandas as pd
+    df = pd.DataFrame(violations, columns=_VIOLATION_COLUMNS)
+    df["_msg_lc"]  = df["message"].fillna("").astype(str).str.lower()
+    df["_code_lc"] = df["code"].fillna("").astype(str).str.lower()
+
+    if len(memo) >= VIOLATION_FRAMES_KEPT:
+        memo.pop(next(iter(memo)))  # Oldest first
+    memo[id(violations)] = (violations, df)
+    return df
+
+
+_FILE_SUMMARY_COLUMNS = ["File", "Functions", "Classes", "Coverage %", "Compliance %", "Violations"]
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _file_summary_frame(run_id: str, _file_results: dict):
+    """Per-file summary table for a processed project, indexed by archive path.
+
+    Only ``run_id`` is hashed: it is unique to each processing run, so it
+    identifies the results without hashing their contents.
+    """
+    import pandas as pd
+    paths = list(_file_results)
+    rows = []
+    for p in paths:
+        d = _file_results[p]
+        iq = d["instrumented_quality"]
+        rows.append({
+            "File": os.path.basename(p),
+            "Functions": iq["total_functions"],
+            "Classes": iq["total_classes"],
+            "Coverage %": iq["coverage_percentage"],
+            "Compliance %": iq["compliance_percentage"],
+            "Violations": len(d["validation"]),
+            "_undocumented": iq["undocumented_items"],
+        })
+    df = pd.DataFrame(rows, index=list(paths), columns=_FILE_SUMMARY_COLUMNS + ["_undocumented"])
+    # Lowercased once here, so a search keystroke is a single vectorised scan
+    df["_file_lc"] = df["File"].str.lower()
+    return df
+
+
 def display_violations(violations: list, label: str = ""):
-    """Render violations as styled cards with an optional expander."""
+    """Render violations as one table; selecting a row shows it as a styled card.
+
+    ``violations`` holds Violation tuples or the equivalent dicts.
+    """
     if not violations:
         st.success(f"✅ No PEP-257 violations {label}")
         return
@@ -308,25 +573,55 @@ def display_violations(violations: list, label: str = ""):
         placeholder="Filter by message or code…",
         help="Narrow violations by typing a keyword from the message or PEP code.",
     )
-    filtered = violations
+    df = _violations_frame(violations)
     if v_search:
         q = v_search.lower()
-        filtered = [v for v in violations
-                    if q in str(v.get("message","")).lower()
-                    or q in str(v.get("code","")).lower()]
+        df = df[df["_msg_lc"].str.contains(q, regex=False) | df["_code_lc"].str.contains(q, regex=False)]
+
+    st.caption(f"Showing {len(df)} of {len(violations)} violations")
+    if df.empty:
+        return
+
+    # One virtualised table instead of an expander per violation
+    event = st.dataframe(
+        df[_VIOLATION_COLUMNS],
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "line": st.column_config.NumberColumn("Line"),
+            "code": st.column_config.TextColumn("Code"),
+            "message": st.column_config.TextColumn("Message", width="large"),
+            "source": st.column_config.TextColumn("Source", width="large"),
+        },
+        on_select="rerun",
+        selection_mode="single-row",
+        key=f"vtable_{label}",
+    )
+
+    if event.selection.rows:
+        # The frame keeps the original positions as its index, even after filtering
+        v = violations[df.index[event.selection.rows[0]]]
+        line, code, message, source = Violation(**v) if isinstance(v, dict) else v
+        # Sent as HTML, not parsed as markdown; message and source quote user code, so escape them.
+        # pydocstyle reports source as False when it has none, so stringify before escaping
+        st.html(_VIOLATION_CARD_TPL(
+            line=line, code=html.escape(str(code)), message=html.escape(str(message)),
+            source=html.escape(str(source)),
+        ))
+
+
+SYMBOL_LIST_COLLAPSE_AT = 500
 
-    st.caption(f"Showing {len(filtered)} of {len(violations)} violations")
 
-    for i, v in enumerate(filtered, 1):
-        with st.expander(f"Violation #{i} — {v.get('code','?')} · Line {v.get('line','?')}"):
-            st.markdown(f"""
-            <div class="violation-card">
-              <b>Line:</b> {v.get('line','–')}<br>
-              <b>Code:</b> <code>{v.get('code','–')}</code><br>
-              <b>Message:</b> {v.get('message','–')}<br>
-              <b>Source:</b> <code>{v.get('source','–')}</code>
-            </div>
-            """, unsafe_allow_html=True)
+def symbol_list(title: str, names: list):
+    """Render symbol names as one bulleted markdown list, collapsed when very long."""
+    bullets = "\n".join(f"- `{name}`" for name in names)
+    if len(names) > SYMBOL_LIST_COLLAPSE_AT:
+        st.markdown(f"**{title}:** {len(names)}")
+        with st.expander("Show all", expanded=False):
+            st.markdown(bullets)
+    else:
+        st.markdown(f"**{title}:**\n" + bullets)
 
 
 def display_documentation_status(
@@ -354,9 +649,7 @@ def display_documentation_status(
             if search:
                 funcs = [f for f in funcs if search in f.lower()]
             if funcs:
-                st.markdown("**Undocumented functions:**")
-                for f in funcs:
-                    st.markdown(f"- `{f}`")
+                symbol_list("Undocumented functions", funcs)
             elif undocd == 0:
                 st.success("All functions are documented!")
             else:
@@ -375,22 +668,158 @@ def display_documentation_status(
             if search:
                 classes = [c for c in classes if search in c.lower()]
             if classes:
-                st.markdown("**Undocumented classes:**")
-                for c in classes:
-                    st.markdown(f"- `{c}`")
+                symbol_list("Undocumented classes", classes)
             elif undocd == 0:
                 st.success("All classes are documented!")
             else:
                 st.info("No matches for current search.")
 
 
+@st.fragment
+def file_details(path: str, fd: dict):
+    """Metrics, symbols, violations and code for one processed file.
+
+    A fragment, so the symbol search and table selections only rerun this
+    panel, not the rest of the page.
+    """
+    oq = fd["original_quality"]
+    iq = fd["instrumented_quality"]
+
+    st.subheader(f"📄 {os.path.basename(path)}")
+    display_metrics_comparison(oq, iq)
+    display_improvement_banner(oq, iq)
+
+    separator()
+    st.markdown("#### 🔍 Symbol Search & Filters")
+    sc1, sc2 = st.columns(2)
+    with sc1:
+        sym_q = st.text_input(
+            "Search functions/classes",
+            key=f"sq_{path}",
+            placeholder="e.g. parse, load…",
+            help=TOOLTIPS["sym_search"],
+        )
+    with sc2:
+        sym_sec = st.multiselect(
+            "Show sections",
+            ["Functions", "Classes"],
+            default=["Functions", "Classes"],
+            key=f"ss_{path}",
+            help=TOOLTIPS["sym_section"],
+        )
+    show_f = "Functions" in sym_sec
+    show_c = "Classes"   in sym_sec
+
+    tb1, tb2 = st.tabs(["Before Instrumentation", "After Instrumentation"])
+    with tb1:
+        display_documentation_status(oq, "Before", sym_q, show_f, show_c)
+        separator()
+        display_violations(fd["original_violations"], "before instrumentation")
+
+    with tb2:
+        display_documentation_status(iq, "After", sym_q, show_f, show_c)
+        separator()
+        display_violations(fd["validation"], "after instrumentation")
+
+    separator()
+    st.subheader("🔀 Code Comparison")
+    code_comparison(fd["original_code"], fd["instrumented_code"], f"full_{path}")
+
+
+def file_explorer(results: dict):
+    """File search, summary table and per-file drill-down for a processed project."""
+    # ── File search & filter ──────────────────
+    separator()
+    st.subheader("📁 File Explorer")
+
+    ff1, ff2 = st.columns(2)
+    with ff1:
+        file_search = st.text_input(
+            "🔍 Search files",
+            placeholder="Type filename…",
+            help=TOOLTIPS["file_search"],
+        )
+    with ff2:
+        file_filter = st.selectbox(
+            "Filter files",
+            ["All files", "Only files with undocumented items", "Only files with PEP-257 violations"],
+            help=TOOLTIPS["file_filter"],
+        )
+
+    shown = _file_summary_frame(results["run_id"], results["file_results"])
+
+    if file_search:
+        shown = shown[shown["_file_lc"].str.contains(file_search.lower(), regex=False)]
+
+    if file_filter == "Only files with undocumented items":
+        shown = shown[shown["_undocumented"] > 0]
+    elif file_filter == "Only files with PEP-257 violations":
+        shown = shown[shown["Violations"] > 0]
+
+    file_options = list(shown.index)
+
+    if not file_options:
+        st.info("ℹ️ No files match the current search/filter settings.")
+    else:
+        # Show file summary table
+        st.caption(f"{len(file_options)} file(s) shown")
+        st.dataframe(
+            shown[_FILE_SUMMARY_COLUMNS].set_index("File"),
+            use_container_width=True,
+        )
+
+        selected_file = st.selectbox(
+            "Select a file to inspect:",
+            file_options,
+            format_func=os.path.basename,
+            help="Choose a file to see detailed before/after documentation status.",
+        )
+
+        if selected_file:
+            file_details(selected_file, results["file_results"][selected_file])
+
+
+@st.fragment
+def download_section(results: dict):
+    """Prepare and download the results ZIP.
+
+    A fragment, so preparing or downloading the archive doesn't rerun the
+    analysis sections above it.
+    """
+    separator()
+    st.subheader("📦 Download All Results")
+    # The archive is only built once the user asks for it
+    zip_bytes = session_zip(results)
+    if zip_bytes is None and st.button(
+        "📦 Prepare ZIP",
+        use_container_width=True,
+        help=TOOLTIPS["download_zip"],
+    ):
+        with st.spinner("⏳ Building ZIP…"):
+            zip_bytes = create_zip_from_results(results)
+        st.session_state.zip_cache = (results, zip_bytes)
+    if zip_bytes is not None:
+        st.download_button(
+            label="📥 Download Full ZIP",
+            data=zip_bytes,
+            file_name="docstringsiva_results.zip",
+            mime="application/zip",
+            help=TOOLTIPS["download_zip"],
+            use_container_width=True,
+            # Identified by the project, not by hashing the archive on every rerun
+            key=f"dl_{results['run_id']}",
+        )
+    with st.expander("📁 What's inside the ZIP?"):
+        st.html(_ZIP_CONTENTS_HTML)
+
+
 # ─────────────────────────────────────────────
 # SIDEBAR
 # ─────────────────────────────────────────────
 with st.sidebar:
     st.markdown("## 📝 Auto-DocstringGen")
     st.markdown("*Automatically generates, validates, and reports PEP-257 compliant docstrings for Python code*")
-    st.markdown("---")
+    separator()
 
     style = st.selectbox(
         "📐 Documentation Style",
@@ -401,7 +830,7 @@ with st.sidebar:
     style_map = {"Google Style": "google", "NumPy Style": "numpy", "reStructuredText": "reST"}
     selected_style = style_map[style]
 
-    st.markdown("---")
+    separator()
     st.markdown("### ℹ️ How It Works")
     with st.expander("Click to expand", expanded=False):
         st.markdown("""
@@ -412,7 +841,7 @@ with st.sidebar:
         5. **Download** results
         """)
 
-    st.markdown("---")
+    separator()
     st.markdown("### 🔑 Style Guide")
     with st.expander("Docstring formats", expanded=False):
         st.markdown("""
@@ -441,7 +870,7 @@ with st.sidebar:
         ```
         """)
 
-    st.markdown("---")
+    separator()
     st.markdown("### 📊 Legend")
     st.markdown("""
     🟢 ≥ 80% — Good  
@@ -449,7 +878,7 @@ with st.sidebar:
     🔴 < 50% — Needs work  
     """)
 
-    st.markdown("---")
+    separator()
     st.caption("Auto-DocstringGen v1.0.0 · [PEP 257](https://peps.python.org/pep-0257/)")
 
 
@@ -461,7 +890,7 @@ st.markdown(
     "**Automated docstring generation & PEP-257 validation** · "
     "Upload a Python file or ZIP, generate missing docstrings, and review quality metrics."
 )
-st.markdown("---")
+separator()
 
 # ─────────────────────────────────────────────
 # FILE UPLOAD
@@ -495,62 +924,40 @@ if uploaded_file:
         with st.spinner("⏳ Analysing and generating docstrings…"):
             try:
                 if uploaded_file.name.endswith(".zip"):
-                    with tempfile.TemporaryDirectory() as tmpdir:
-                        zip_path = os.path.join(tmpdir, uploaded_file.name)
-                        with open(zip_path, "wb") as f:
-                            f.write(uploaded_file.getbuffer())
-                        with zipfile.ZipFile(zip_path, "r") as zr:
-                            zr.extractall(tmpdir)
-                        results = CodeInstrumentor.process_directory(tmpdir, selected_style)
-                        st.session_state.results = results
-                        # Clear single-file state
-                        for k in ["original_code", "instrumented_code", "original_quality",
-                                  "instrumented_quality", "validation_results",
-                                  "original_violations", "original_coverage_report",
-                                  "instrumented_coverage_report", "original_compliance_report",
-                                  "instrumented_compliance_report"]:
-                            st.session_state[k] = None
+                    import zipfile  # Only the ZIP path needs this
+                    # The upload is already in memory, so its sources are read without extracting to disk
+                    uploaded_file.seek(0)
+                    with zipfile.ZipFile(uploaded_file, "r") as zr:
+                        sources = {
+                            info.filename: read_source(zr.read(info))
+                            for info in zr.infolist()
+                            if info.filename.endswith(".py") and not info.is_dir()
+                        }
+                    try:
+                        results = CodeInstrumentor.process_sources(
+                            sources, selected_style, executor=_worker_pool()
+                        )
+                    except BrokenProcessPool:
+                        # A worker died; release this pool and start a fresh one next time
+                        _worker_pool().shutdown(wait=False)
+                        _worker_pool.clear()
+                        raise
+                    # Identifies this run to the caches and widgets keyed on it
+                    results["run_id"] = os.urandom(8).hex()
+                    st.session_state.results = results
+                    # Clear single-file state
+                    for k in ["original_code", "instrumented_code", "original_quality",
+                              "instrumented_quality", "validation_results",
+                              "original_violations", "original_coverage_report",
+                              "instrumented_coverage_report", "original_compliance_report",
+                              "instrumented_compliance_report"]:
+                        st.session_state[k] = None
                 else:
-                    content = uploaded_file.getvalue().decode("utf-8")
+                    # Decode straight from the upload's buffer, without copying it to bytes first
+                    content = read_source(uploaded_file.getbuffer())
                     st.session_state.original_code    = content
                     st.session_state.results          = None
-
-                    oq = DocstringValidator.analyze_code_quality(content)
-                    st.session_state.original_quality         = oq
-                    st.session_state.original_coverage_report = generate_before_coverage_report(oq)
-
-                    orig_v = [
-                        {"line": v.line, "code": v.code, "message": v.message, "source": v.source}
-                        for v in oq["violations"]
-                    ]
-                    st.session_state.original_violations      = orig_v
-                    st.session_state.original_compliance_report = generate_compliance_report(
-                        orig_v, "PEP-257 Compliance Report (Before Instrumentation)"
-                    )
-
-                    inst = CodeInstrumentor.add_docstrings(content, selected_style)
-                    st.session_state.instrumented_code = inst
-
-                    iq = DocstringValidator.analyze_code_quality(inst)
-                    st.session_state.instrumented_quality           = iq
-                    st.session_state.instrumented_coverage_report   = generate_after_coverage_report(iq)
-
-                    import tempfile as _tf, os as _os
-                    fd, tmp_path = _tf.mkstemp(suffix=".py", text=True)
-                    try:
-                        with _os.fdopen(fd, "w", encoding="utf-8") as tmp:
-                            tmp.write(inst)
-                        val = DocstringValidator.validate_file(tmp_path)
-                    finally:
-                        try:
-                            _os.unlink(tmp_path)
-                        except OSError:
-                            pass
-
-                    st.session_state.validation_results = val
-                    st.session_state.instrumented_compliance_report = generate_compliance_report(
-                        val, "PEP-257 Compliance Report (After Instrumentation)"
-                    )
+                    st.session_state.update(process_source(content, selected_style))
 
                 st.success("✅ Processing complete!")
 
@@ -570,15 +977,15 @@ if (
     oq = st.session_state.original_quality
     iq = st.session_state.instrumented_quality
 
-    st.markdown("---")
+    separator()
     st.subheader("📊 Metrics Overview")
     display_metrics_comparison(oq, iq)
 
-    st.markdown("---")
+    separator()
     display_improvement_banner(oq, iq)
 
     # ── Filters ──────────────────────────────
-    st.markdown("---")
+    separator()
     st.subheader("🔍 Documentation Status")
     fc1, fc2 = st.columns(2)
     with fc1:
@@ -601,18 +1008,18 @@ if (
 
     with tab_before:
         display_documentation_status(oq, "Before Instrumentation", sq, show_f, show_c)
-        st.markdown("---")
+        separator()
         st.markdown("#### PEP-257 Violations (Before)")
         display_violations(st.session_state.original_violations or [], "before instrumentation")
 
     with tab_after:
         display_documentation_status(iq, "After Instrumentation", sq, show_f, show_c)
-        st.markdown("---")
+        separator()
         st.markdown("#### PEP-257 Violations (After)")
         display_violations(st.session_state.validation_results or [], "after instrumentation")
 
     # ── Reports ───────────────────────────────
-    st.markdown("---")
+    separator()
     st.subheader("📄 Detailed Reports")
     rt1, rt2 = st.tabs(["Coverage Reports", "Compliance Reports"])
 
@@ -643,21 +1050,20 @@ if (
                                file_name="compliance_after.txt", mime="text/plain")
 
     # ── Code comparison ───────────────────────
-    st.markdown("---")
+    separator()
     st.subheader("🔀 Code Comparison")
-    code_c1, code_c2 = st.columns(2)
-    with code_c1:
-        st.caption("Original Code")
-        st.code(st.session_state.original_code, language="python")
-    with code_c2:
-        st.caption("Instrumented Code")
-        st.code(st.session_state.instrumented_code, language="python")
-        st.download_button(
-            "📥 Download Instrumented Code",
-            st.session_state.instrumented_code,
-            file_name=f"instrumented_{uploaded_file.name if uploaded_file else 'code.py'}",
-            mime="text/plain",
-        )
+    code_comparison(
+        st.session_state.original_code,
+        st.session_state.instrumented_code,
+        "full_single",
+        titles=("Original Code", "Instrumented Code"),
+    )
+    st.download_button(
+        "📥 Download Instrumented Code",
+        st.session_state.instrumented_code,
+        file_name=f"instrumented_{uploaded_file.name if uploaded_file else 'code.py'}",
+        mime="text/plain",
+    )
 
 
 # ─────────────────────────────────────────────
@@ -668,164 +1074,20 @@ if st.session_state.results:
     orig_sum  = results["original_summary"]
     inst_sum  = results["instrumented_summary"]
 
-    st.markdown("---")
+    separator()
     st.subheader("📊 Project-wide Analysis")
     display_metrics_comparison(orig_sum, inst_sum)
 
-    st.markdown("---")
+    separator()
     display_improvement_banner(orig_sum, inst_sum)
 
-    # ── File search & filter ──────────────────
-    st.markdown("---")
-    st.subheader("📁 File Explorer")
-
-    ff1, ff2 = st.columns(2)
-    with ff1:
-        file_search = st.text_input(
-            "🔍 Search files",
-            placeholder="Type filename…",
-            help=TOOLTIPS["file_search"],
-        )
-    with ff2:
-        file_filter = st.selectbox(
-            "Filter files",
-            ["All files", "Only files with undocumented items", "Only files with PEP-257 violations"],
-            help=TOOLTIPS["file_filter"],
-        )
-
-    file_options = list(results["file_results"].keys())
-
-    if file_search:
-        file_options = [f for f in file_options if file_search.lower() in os.path.basename(f).lower()]
-
-    if file_filter != "All files":
-        filtered = []
-        for path in file_options:
-            d = results["file_results"][path]
-            if file_filter == "Only files with undocumented items" and d["instrumented_quality"]["undocumented_items"] > 0:
-                filtered.append(path)
-            elif file_filter == "Only files with PEP-257 violations" and len(d["validation"]) > 0:
-                filtered.append(path)
-        file_options = filtered
-
-    if not file_options:
-        st.info("ℹ️ No files match the current search/filter settings.")
-    else:
-        # Show file summary table
-        st.caption(f"{len(file_options)} file(s) shown")
-        summary_rows = []
-        for p in file_options:
-            d = results["file_results"][p]
-            iq = d["instrumented_quality"]
-            summary_rows.append({
-                "File": os.path.basename(p),
-                "Functions": iq["total_functions"],
-                "Classes": iq["total_classes"],
-                "Coverage %": iq["coverage_percentage"],
-                "Compliance %": iq["compliance_percentage"],
-                "Violations": len(d["validation"]),
-            })
-        import pandas as pd
-        st.dataframe(
-            pd.DataFrame(summary_rows).set_index("File"),
-            use_container_width=True,
-        )
-
-        selected_file = st.selectbox(
-            "Select a file to inspect:",
-            file_options,
-            format_func=os.path.basename,
-            help="Choose a file to see detailed before/after documentation status.",
-        )
-
-        if selected_file:
-            fd = results["file_results"][selected_file]
-            oq = fd["original_quality"]
-            iq = fd["instrumented_quality"]
-
-            st.subheader(f"📄 {os.path.basename(selected_file)}")
-            display_metrics_comparison(oq, iq)
-            display_improvement_banner(oq, iq)
-
-            st.markdown("---")
-            st.markdown("#### 🔍 Symbol Search & Filters")
-            sc1, sc2 = st.columns(2)
-            with sc1:
-                sym_q = st.text_input(
-                    "Search functions/classes",
-                    key=f"sq_{selected_file}",
-                    placeholder="e.g. parse, load…",
-                    help=TOOLTIPS["sym_search"],
-                )
-            with sc2:
-                sym_sec = st.multiselect(
-                    "Show sections",
-                    ["Functions", "Classes"],
-                    default=["Functions", "Classes"],
-                    key=f"ss_{selected_file}",
-                    help=TOOLTIPS["sym_section"],
-                )
-            show_f = "Functions" in sym_sec
-            show_c = "Classes"   in sym_sec
-
-            tb1, tb2 = st.tabs(["Before Instrumentation", "After Instrumentation"])
-            with tb1:
-                display_documentation_status(oq, "Before", sym_q, show_f, show_c)
-                st.markdown("---")
-                before_v = [
-                    {"line": v.line, "code": v.code, "message": v.message, "source": v.source}
-                    for v in fd["original_violations"]
-                ]
-                display_violations(before_v, "before instrumentation")
-
-            with tb2:
-                display_documentation_status(iq, "After", sym_q, show_f, show_c)
-                st.markdown("---")
-                display_violations(fd["validation"], "after instrumentation")
-
-            st.markdown("---")
-            st.subheader("🔀 Code Comparison")
-            cc1, cc2 = st.columns(2)
-            with cc1:
-                st.caption("Original")
-                st.code(fd["original_code"], language="python")
-            with cc2:
-                st.caption("Instrumented")
-                st.code(fd["instrumented_code"], language="python")
+    file_explorer(results)
 
     # ── Download all ──────────────────────────
-    st.markdown("---")
-    st.subheader("📦 Download All Results")
-    zip_buf = create_zip_from_results(results)
-    st.download_button(
-        label="📥 Download Full ZIP",
-        data=zip_buf,
-        file_name="docstringsiva_results.zip",
-        mime="application/zip",
-        help=TOOLTIPS["download_zip"],
-        use_container_width=True,
-    )
-    with st.expander("📁 What's inside the ZIP?"):
-        st.markdown("""
-        For each processed `.py` file:
-        - `original_<file>.py` — original source
-        - `instrumented_<file>.py` — source with generated docstrings
-        - `coverage_original_<file>.txt` — coverage report before
-        - `coverage_instrumented_<file>.txt` — coverage report after
-        - `compliance_original_<file>.txt` — PEP-257 report before
-        - `compliance_instrumented_<file>.txt` — PEP-257 report after
-
-        Plus a `project_summary.txt` with overall metrics.
-        """)
+    download_section(results)
 
 # ─────────────────────────────────────────────
 # FOOTER
 # ─────────────────────────────────────────────
-st.markdown("---")
-st.markdown("""
-<div style='text-align:center;color:#9ca3af;font-size:0.82rem'>
-  Auto-DocstringGen v1.0.0 &nbsp;·&nbsp; Milestone 4 &nbsp;·&nbsp;
-  <a href="https://peps.python.org/pep-0257/" target="_blank" style="color:#7c3aed">PEP 257</a> &nbsp;·&nbsp;
-  <a href="https://pypi.org/project/docstringsiva/" target="_blank" style="color:#7c3aed">PyPI</a>
-</div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+separator()
+st.html(_FOOTER)
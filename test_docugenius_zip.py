@@ -0,0 +1,34 @@
+import io
+import zipfile
+
+from docugenius_zip import ZIP_STORE_BELOW, build_zip
+
+
+def _members():
+    """A short member (stored), a long one (deflated) and a non-ASCII name."""
+    return [
+        ("short.py", "x = 1\n"),
+        ("long.py", "def f():\n    return 'é'\n" * (ZIP_STORE_BELOW // 10)),
+        ("résumé.txt", "naïve\n" * ZIP_STORE_BELOW),
+    ]
+
+
+def _read_back(archive: bytes):
+    """Open an archive, check every CRC, and return (infos, {name: text})."""
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        assert zf.testzip() is None
+        infos = {info.filename: info for info in zf.infolist()}
+        texts = {name: zf.read(name).decode("utf-8") for name in zf.namelist()}
+    return infos, texts
+
+
+def test_build_zip_round_trips_stored_and_deflated_members():
+    """Members should read back unchanged, stored when short and deflated otherwise."""
+    members = _members()
+    infos, texts = _read_back(build_zip(members))
+
+    assert list(texts) == [name for name, _ in members]
+    assert texts == dict(members)
+    assert infos["short.py"].compress_type == zipfile.ZIP_STORED
+    assert infos["long.py"].compress_type == zipfile.ZIP_DEFLATED
+    assert infos["résumé.txt"].compress_type == zipfile.ZIP_DEFLATED
@@ -1,18 +1,74 @@
 import ast
+import sys
+from pathlib import Path
 
 import pytest
 
-from m2_core import CodeInstrumentor, DocstringValidator
+import m2_core
+from m2_core import CodeInstrumentor, DocstringGenerator, DocstringValidator
 
+# Module docstring line the instrumentor is expected to add to empty files
+_MODULE_DOCSTRING = '"""Module for processing Python files."""'
 
-def _get_function_and_class_nodes(source: str):
-    """Helper to parse source and return (functions, classes)."""
-    tree = ast.parse(source)
-    functions = [n for n in ast.walk(tree) if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
-    classes = [n for n in ast.walk(tree) if isinstance(n, ast.ClassDef)]
+# Source shared by several tests
+_ADD_SOURCE = """
+def add(x, y):
+    return x + y
+"""
+
+
+class _DefinitionNodes(ast.NodeVisitor):
+    """Collect function and class nodes by name, first definition in source order winning."""
+
+    def __init__(self):
+        self.functions = {}
+        self.classes = {}
+
+    def visit_FunctionDef(self, node):
+        self.functions.setdefault(node.name, node)
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node):
+        self.classes.setdefault(node.name, node)
+        self.generic_visit(node)
+
+    def generic_visit(self, node):
+        # Definitions only appear in statement lists, so expressions are never entered
+        for field in ("body", "handlers", "orelse", "finalbody", "cases"):
+            stmts = getattr(node, field, None)
+            if stmts:
+                for stmt in stmts:
+                    self.visit(stmt)
+
+
+def _get_function_and_class_nodes(tree: ast.AST):
+    """Helper to return (functions, classes) anywhere in a parsed tree, keyed by name."""
+    collector = _DefinitionNodes()
+    collector.visit(tree)
+    return collector.functions, collector.classes
+
+
+def _get_top_level_function_and_class_nodes(tree: ast.Module):
+    """Helper like _get_function_and_class_nodes, but only for module-level definitions."""
+    functions, classes = {}, {}
+    for node in tree.body:
+        node_type = type(node)
+        if node_type is ast.FunctionDef or node_type is ast.AsyncFunctionDef:
+            functions.setdefault(node.name, node)
+        elif node_type is ast.ClassDef:
+            classes.setdefault(node.name, node)
     return functions, classes
 
 
+def _has_docstring(node: ast.AST) -> bool:
+    """Helper to check for a docstring without ast.get_docstring's cleandoc pass."""
+    first = node.body[0] if node.body else None
+    # Only a bare expression statement can be a docstring, e.g. not `x = "text"`
+    return type(first) is ast.Expr and type(getattr(first.value, "value", None)) is str
+
+
 def test_empty_python_file_analysis():
     """Empty Python files should not crash and should report zero items."""
     result = DocstringValidator.analyze_code_quality("")
@@ -29,7 +85,7 @@ def test_empty_python_file_instrumentation_adds_module_docstring():
     """Instrumenting an empty file should at least add a module docstring."""
     instrumented = CodeInstrumentor.add_docstrings("", style="google")
 
-    assert '"""Module for processing Python files."""' in instrumented
+    assert _MODULE_DOCSTRING in instrumented
     # Resulting code should still be valid Python
     ast.parse(instrumented)
 
@@ -43,14 +99,15 @@ def outer(x):
     return inner(x)
 """
     instrumented = CodeInstrumentor.add_docstrings(source, style="google")
-    functions, _ = _get_function_and_class_nodes(instrumented)
+    tree = ast.parse(instrumented)
+    functions, _ = _get_function_and_class_nodes(tree)
 
-    outer = next(f for f in functions if f.name == "outer")
-    inner = next(f for f in functions if f.name == "inner")
+    outer = functions["outer"]
+    inner = functions["inner"]
 
-    assert ast.get_docstring(outer) is not None
+    assert _has_docstring(outer)
     # Inner function is currently not documented by the instrumentor
-    assert ast.get_docstring(inner) is None
+    assert not _has_docstring(inner)
 
 
 def test_decorated_functions_are_instrumented():
@@ -66,10 +123,11 @@ def decorated(a, b):
     return a + b
 """
     instrumented = CodeInstrumentor.add_docstrings(source, style="google")
-    functions, _ = _get_function_and_class_nodes(instrumented)
+    tree = ast.parse(instrumented)
+    functions, _ = _get_top_level_function_and_class_nodes(tree)
 
-    decorated = next(f for f in functions if f.name == "decorated")
-    assert ast.get_docstring(decorated) is not None
+    decorated = functions["decorated"]
+    assert _has_docstring(decorated)
 
 
 def test_class_without_methods_is_handled():
@@ -84,10 +142,42 @@ class Empty:
     assert original_quality["documented_classes"] == 0
 
     instrumented = CodeInstrumentor.add_docstrings(source, style="google")
-    _, classes = _get_function_and_class_nodes(instrumented)
-    empty_class = next(c for c in classes if c.name == "Empty")
+    tree = ast.parse(instrumented)
+    _, classes = _get_top_level_function_and_class_nodes(tree)
+    empty_class = classes["Empty"]
 
-    assert ast.get_docstring(empty_class) is not None
+    assert _has_docstring(empty_class)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="match needs Python 3.10")
+def test_init_attributes_inside_match_cases_are_found():
+    """Attributes assigned in a match case inside __init__ should be listed."""
+    source = """
+class Config:
+    def __init__(self, kind):
+        match kind:
+            case 1:
+                self.x = 1
+"""
+    info = DocstringGenerator().extract_class_info(ast.parse(source).body[0])
+
+    assert info["attributes"] == [("x", "Any")]
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="except* needs Python 3.11")
+def test_init_attributes_inside_except_star_are_found():
+    """Attributes assigned in an except* handler inside __init__ should be listed."""
+    source = """
+class Config:
+    def __init__(self):
+        try:
+            pass
+        except* ValueError:
+            self.y = 2
+"""
+    info = DocstringGenerator().extract_class_info(ast.parse(source).body[0])
+
+    assert info["attributes"] == [("y", "Any")]
 
 
 def test_already_documented_functions_are_not_overwritten():
@@ -98,13 +188,30 @@ def documented(x, y):
     return x * y
 '''
     instrumented = CodeInstrumentor.add_docstrings(source, style="google")
-    functions, _ = _get_function_and_class_nodes(instrumented)
+    tree = ast.parse(instrumented)
+    functions, _ = _get_top_level_function_and_class_nodes(tree)
 
-    documented = next(f for f in functions if f.name == "documented")
+    documented = functions["documented"]
     doc = ast.get_docstring(documented)
     assert "existing, meaningful docstring" in doc
 
 
+def test_short_indented_docstrings_are_regenerated():
+    """Indentation inside a docstring should not count towards keeping it."""
+    source = '''
+def short(x):
+    """Add.
+
+                x
+    """
+    return x
+'''
+    instrumented = CodeInstrumentor.add_docstrings(source, style="google")
+    functions, _ = _get_top_level_function_and_class_nodes(ast.parse(instrumented))
+
+    assert ast.get_docstring(functions["short"]).startswith("short function.")
+
+
 def test_syntax_error_input_raises_syntaxerror():
     """Invalid Python input should raise SyntaxError during analysis."""
     bad_source = "def broken(:\n    pass"
@@ -113,7 +220,7 @@ def test_syntax_error_input_raises_syntaxerror():
         DocstringValidator.analyze_code_quality(bad_source)
 
 
-def test_instrumented_code_has_zero_pydocstyle_violations(tmp_path):
+def test_instrumented_code_has_zero_pydocstyle_violations():
     """Instrumented code should be PEP-257 clean (no violations)."""
     source = """
 def add(x, y):
@@ -126,10 +233,117 @@ class Foo:
 """
     instrumented = CodeInstrumentor.add_docstrings(source, style="google")
 
-    # Write to a tempfile and validate via pydocstyle
+    # Validate in memory; test_validate_source_matches_validate_file covers the file path
+    violations = DocstringValidator.validate_source(instrumented)
+    assert violations == [], f"Expected 0 violations, got: {violations}"
+
+
+
+def test_repeated_analysis_returns_independent_reports():
+    """Cached quality reports should not leak caller mutations into later calls."""
+    source = _ADD_SOURCE
+    first = DocstringValidator.analyze_code_quality(source)
+    first["coverage_percentage"] = -1
+    first["undocumented_functions"].append("bogus")
+    first["violations"].clear()
+
+    second = DocstringValidator.analyze_code_quality(source)
+    assert second["coverage_percentage"] == 0
+    assert second["undocumented_functions"] == ["add"]
+    assert len(second["violations"]) == second["violation_count"]
+
+
+def test_rest_style_is_accepted_case_insensitively():
+    """The reST style should be usable as spelled in the UI ("reST")."""
+    source = _ADD_SOURCE
+    instrumented = CodeInstrumentor.add_docstrings(source, style="reST")
+    assert ":param x" in instrumented
+
+
+def test_validate_source_matches_validate_file(tmp_path):
+    """In-memory validation should report the same violations as validating a file."""
+    source = _ADD_SOURCE
     file_path = tmp_path / "sample.py"
-    file_path.write_text(instrumented, encoding="utf-8")
+    file_path.write_text(source, encoding="utf-8")
 
-    violations = DocstringValidator.validate_file(str(file_path))
-    assert violations == [], f"Expected 0 violations, got: {violations}"
+    from_file = DocstringValidator.validate_file(str(file_path))
+    assert DocstringValidator.validate_source(source) == from_file
+
+
+def test_process_sources_matches_process_directory(tmp_path):
+    """In-memory sources should give the same results as the same files on disk."""
+    sources = {
+        "add.py": "def add(x, y):\n    return x + y\n",
+        "pkg/point.py": "class Point:\n    def norm(self):\n        return 0\n",
+    }
+    for name, source in sources.items():
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(source, encoding="utf-8")
+
+    from_disk = CodeInstrumentor.process_directory(str(tmp_path))
+    in_memory = CodeInstrumentor.process_sources(sources)
+
+    assert in_memory["original_summary"] == from_disk["original_summary"]
+    assert in_memory["instrumented_summary"] == from_disk["instrumented_summary"]
+    for path, result in from_disk["file_results"].items():
+        name = Path(path).relative_to(tmp_path).as_posix()
+        assert in_memory["file_results"][name] == result
+
+
+def test_identical_sources_get_independent_results():
+    """Names with the same source should get equal results that don't share state."""
+    source = "def add(x, y):\n    return x + y\n"
+    results = CodeInstrumentor.process_sources({"a.py": source, "b.py": source})["file_results"]
+
+    assert results["a.py"] == results["b.py"]
+    results["a.py"]["original_quality"]["violations"].clear()
+    results["a.py"]["validation"].append({})
+    assert results["b.py"]["original_quality"]["violations"]
+    assert results["b.py"]["original_violations"] is results["b.py"]["original_quality"]["violations"]
+    assert results["b.py"]["validation"] != results["a.py"]["validation"]
+
+
+def test_small_inputs_are_processed_without_a_process_pool(monkeypatch):
+    """A few small sources should not start worker processes."""
+    def no_pool(*args, **kwargs):
+        raise AssertionError("ProcessPoolExecutor started")
+
+    monkeypatch.setattr(m2_core, "ProcessPoolExecutor", no_pool)
+    results = CodeInstrumentor.process_sources({"a.py": "x = 1\n", "b.py": "y = 2\n"})
+
+    assert set(results["file_results"]) == {"a.py", "b.py"}
+
+
+def test_process_directory_cache_is_opt_in_and_round_trips(tmp_path):
+    """Results loaded from a cache file should match freshly computed ones."""
+    source_dir = tmp_path / "src"
+    source_dir.mkdir()
+    (source_dir / "add.py").write_text(_ADD_SOURCE, encoding="utf-8")
+    cache_path = tmp_path / "cache.json"
+
+    fresh = CodeInstrumentor.process_directory(str(source_dir))
+    assert not cache_path.exists()
+
+    first = CodeInstrumentor.process_directory(str(source_dir), cache_path=str(cache_path))
+    cached = CodeInstrumentor.process_directory(str(source_dir), cache_path=str(cache_path))
+    assert "original_code" not in cache_path.read_text(encoding="utf-8")
+    assert first == fresh
+    assert cached == fresh
+
+
+def test_add_docstrings_with_tree_matches_parsed_source():
+    """The returned tree should be what parsing the returned source gives."""
+    source = """
+class Point:
+    def norm(self):
+        return 0
+
+
+def add(x, y):
+    return x + y
+"""
+    instrumented, tree = CodeInstrumentor.add_docstrings_with_tree(source, style="google")
 
+    assert instrumented == CodeInstrumentor.add_docstrings(source, style="google")
+    assert ast.dump(tree) == ast.dump(ast.parse(instrumented))